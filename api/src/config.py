@@ -9,6 +9,32 @@ class Settings(BaseSettings):
     algorand_indexer_url: str = "http://localhost:8980"
     algorand_network: str = "localnet"
     service_account_mnemonic: str = "your 25 word mnemonic here"
+    # Route chain calls to the in-process mock blockchain when it is importable;
+    # disable to exercise the algod code path (e.g. against contracts/src/mock_algod.py)
+    use_mock_blockchain: bool = True
+    # Claim submissions arriving within the delay are sent as one atomic group
+    claim_batch_size: int = 16
+    claim_batch_delay_ms: int = 5
+    # Fee policy when the node reports congestion (fees in microAlgos)
+    congestion_fee_multiplier: float = 2.0
+    max_txn_fee: int = 20000
+    # Keep the claims table in sync with the chain from a background follower
+    chain_sync_enabled: bool = True
+    # Box reads in flight per batch balance lookup
+    balance_lookup_concurrency: int = 16
+    # Per-endpoint circuit breakers in front of the node: a circuit opens when
+    # this share of recent calls fails (or is slow), and is probed again after
+    # breaker_open_seconds. While open, calls get the degraded behavior:
+    # "mock" answers with mock data, "fail" raises at once
+    breaker_failure_rate: float = 0.5
+    breaker_slow_call_rate: float = 0.5
+    breaker_window: int = 20
+    breaker_min_calls: int = 5
+    breaker_open_seconds: float = 30.0
+    algorand_degraded_mode: str = "mock"
+    # Where the mock blockchain keeps its data ("memory" storage persists nothing)
+    mock_chain_data_dir: str = "./blockchain_data"
+    mock_chain_storage: str = "wal"
     
     # IPFS
     ipfs_api_url: str = "http://localhost:5001"
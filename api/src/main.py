@@ -9,6 +9,12 @@ from src.config import settings
 from src.database import init_db
 from src.routers import claims, validations, predictions, users, websocket
 from src.services.algorand import AlgorandService
+from src.services.algod_client import close_clients
+from src.services.confirmation import close_trackers
+from src.services.params_cache import close_params_caches
+from src.services.chain_follower import close_followers
+from src.services.claim_sync import start_claim_sync
+from src.services.circuit_breaker import breaker_stats
 from src.services.ipfs import IPFSService
 
 # Configure logging
@@ -21,6 +27,7 @@ logger = logging.getLogger(__name__)
 # Initialize services
 algorand_service = None
 ipfs_service = None
+claim_sync = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,10 +40,23 @@ async def lifespan(app: FastAPI):
     logger.info("✅ Database initialized")
     
     # Initialize services
-    global algorand_service, ipfs_service
+    global algorand_service, ipfs_service, claim_sync
     algorand_service = AlgorandService()
     ipfs_service = IPFSService()
     
+    # Push every confirmed transaction to websocket clients
+    async def push_confirmation(tx_id: str, result: dict):
+        await websocket.broadcast_event("transaction_confirmed", {
+            "tx_id": tx_id,
+            "confirmed_round": result.get("confirmed-round")
+        })
+    algorand_service.confirmations.add_listener(push_confirmation)
+    
+    # Keep the claims table in sync with the chain
+    if settings.chain_sync_enabled:
+        claim_sync = await start_claim_sync(algorand_service)
+        logger.info("✅ Claim sync started")
+    
     # Test connections
     try:
         await algorand_service.health_check()
@@ -54,6 +74,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down DeFacto API...")
+    if claim_sync:
+        await claim_sync.close()
+    await close_trackers()
+    await close_params_caches()
+    await close_followers()
+    await close_clients()
 
 # Create FastAPI app
 app = FastAPI(
@@ -114,6 +140,11 @@ async def health_check():
         content=status
     )
 
+@app.get("/health/circuits")
+async def circuit_status():
+    """State and metrics of the Algorand node circuit breakers"""
+    return breaker_stats()
+
 # Include routers
 app.include_router(claims.router, prefix="/claims", tags=["claims"])
 app.include_router(validations.router, prefix="/validations", tags=["validations"])
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from src.database import Base
+from datetime import datetime
+
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+    
+    source = Column(String(100), primary_key=True)  # e.g. "indexer:<url>"
+    position = Column(Integer, nullable=False, default=0)  # Last round (or event seq) applied
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
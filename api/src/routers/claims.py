@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional, List
 from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.database import get_db
@@ -51,20 +52,31 @@ async def submit_claim(
             category=claim.category
         )
         
-        # Save to database for fast queries
-        db_claim = Claim(
-            claim_id=blockchain_result["claim_id"],
-            title=claim.title,
-            content=claim.content,
-            category=claim.category,
-            status="UNVERIFIED",
-            ipfs_hash=ipfs_hash,
-            tx_id=blockchain_result["tx_id"],
-            voting_ends_at=datetime.utcnow() + timedelta(seconds=settings.voting_period_seconds)
-        )
-        
-        db.add(db_claim)
-        db.commit()
+        # Save to database for fast queries (the chain follower may have
+        # recorded the claim already, with a placeholder title)
+        for attempt in range(2):
+            db_claim = db.query(Claim).filter(Claim.claim_id == blockchain_result["claim_id"]).first()
+            if db_claim is None:
+                db_claim = Claim(
+                    claim_id=blockchain_result["claim_id"],
+                    status="UNVERIFIED",
+                    ipfs_hash=ipfs_hash,
+                    voting_ends_at=datetime.utcnow() + timedelta(seconds=settings.voting_period_seconds)
+                )
+                db.add(db_claim)
+            db_claim.title = claim.title
+            db_claim.content = claim.content
+            db_claim.category = claim.category
+            db_claim.tx_id = blockchain_result["tx_id"]
+            
+            try:
+                db.commit()
+                break
+            except IntegrityError:
+                # The claim sync inserted the row since the query: update it instead
+                db.rollback()
+                if attempt:
+                    raise
         db.refresh(db_claim)
         
         return ClaimSubmissionResponse(
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+from pydantic import Field
+from typing import Annotated, List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 import math
@@ -11,6 +12,7 @@ from src.schemas.prediction import (
     CreateMarketResponse,
     PlaceBetRequest,
     PlaceBetResponse,
+    MarketDepth,
     MarketPosition,
     UserPositionsResponse
 )
@@ -25,6 +27,9 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../contracts/src'))
 
+# Pricing engine shared with the mock blockchain
+from market_amm import create_amm, amm_for_market
+
 try:
     from mock_blockchain import get_blockchain
     USE_BLOCKCHAIN = True
@@ -37,15 +42,18 @@ except ImportError:
 markets = {}
 positions = {}
 market_counter = 0
+amm = create_amm()
+
+# Order sizes quoted when a depth request names none (the bet size range)
+DEPTH_LADDER = [10, 25, 50, 100, 250, 500, 1000]
+
+# Order sizes a depth request may name: positive and no larger than a bet
+DepthAmount = Annotated[float, Field(gt=0, le=1000)]
+MAX_DEPTH_AMOUNTS = 50
 
 def calculate_price(yes_stake: float, no_stake: float) -> tuple[float, float]:
     """Calculate market prices using constant product AMM"""
-    total = yes_stake + no_stake
-    if total == 0:
-        return 0.5, 0.5
-    
-    yes_price = yes_stake / total
-    no_price = no_stake / total
+    yes_price, no_price = amm.prices(yes_stake, no_stake)
     
     yes_price = max(0.01, min(0.99, yes_price))
     no_price = max(0.01, min(0.99, no_price))
@@ -164,4 +172,41 @@ async def list_markets(
         
     except Exception as e:
         logger.error(f"Failed to list markets: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/markets/{market_id}/depth", response_model=MarketDepth)
+async def get_market_depth(
+    market_id: int,
+    position: str = Query("YES", pattern="^(YES|NO)$"),
+    amounts: Optional[List[DepthAmount]] = Query(None, max_length=MAX_DEPTH_AMOUNTS)
+):
+    """Quote a ladder of order sizes against a market in one pass"""
+    try:
+        market = markets.get(market_id)
+        if market is None and USE_BLOCKCHAIN:
+            market = get_blockchain().get_market(market_id)
+        if market is None:
+            raise HTTPException(status_code=404, detail="Market not found")
+        
+        quotes = amm_for_market(market).quote_many(
+            market["total_yes_stake"],
+            market["total_no_stake"],
+            position,
+            amounts or DEPTH_LADDER
+        )
+        
+        return MarketDepth(
+            market_id=market_id,
+            position=position,
+            amounts=quotes["amounts"].tolist(),
+            shares=quotes["shares"].tolist(),
+            avg_prices=quotes["avg_price"].tolist(),
+            price_impact=quotes["price_impact"].tolist(),
+            yes_prices=quotes["yes_price"].tolist()
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to quote market depth: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
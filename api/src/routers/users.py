@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import Optional
+from src.schemas.user import BalancesRequest
 from src.services.algorand import AlgorandService
 from src.config import settings
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,4 +32,45 @@ async def get_user_balance(address: str):
         return {"address": address, "balance": balance}
     except Exception as e:
         logger.error(f"Failed to get balance: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/balances")
+async def get_user_balances(request: BalancesRequest):
+    """
+    Get many users' reputation token balances in one response
+    Balances are streamed as {"balances": [{"address", "balance"}, ...]} in
+    the order they resolve. A lookup failing before the first balance fails
+    the request; one failing after the response has started ends the stream
+    with an "error" field next to the balances sent so far.
+    """
+    results = algorand_service.get_user_balances(request.addresses)
+    # Resolve the first balance before sending the status line, so a node
+    # that is down (or an open circuit) still gets an error response
+    try:
+        first = [await results.__anext__()]
+    except StopAsyncIteration:
+        first = []
+    except Exception as e:
+        await results.aclose()
+        logger.error(f"Failed to get balances: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def stream():
+        yield '{"balances": ['
+        separator = ""
+        try:
+            for address, balance in first:
+                yield json.dumps({"address": address, "balance": balance})
+                separator = ","
+            async for address, balance in results:
+                yield separator + json.dumps({"address": address, "balance": balance})
+                separator = ","
+        except Exception as e:
+            logger.error(f"Failed to get balances: {e}")
+            yield "], " + json.dumps({"error": str(e)})[1:]
+            return
+        finally:
+            await results.aclose()
+        yield "]}"
+    
+    return StreamingResponse(stream(), media_type="application/json")
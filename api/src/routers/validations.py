@@ -12,6 +12,7 @@ from src.schemas.validation import (
     PendingValidationsResponse
 )
 from src.services.algorand import AlgorandService
+from src.services.claim_sync import follows_chain
 from src.config import settings
 import logging
 
@@ -36,25 +37,27 @@ async def submit_vote(
             raise HTTPException(status_code=400, detail="Voting period closed")
         
         # Submit vote to blockchain
-        tx_id = await algorand_service.submit_vote(
+        result = await algorand_service.submit_vote(
             claim_id=vote_request.claim_id,
             vote=vote_request.vote,
             stake_amount=vote_request.stake_amount
         )
         
-        # Update vote counts in database (cache)
-        if vote_request.vote:
-            claim.yes_votes += 1
-            claim.total_stake += vote_request.stake_amount
-        else:
-            claim.no_votes += 1
-            claim.total_stake += vote_request.stake_amount
-        
-        db.commit()
+        # Update vote counts in database (cache), unless the vote reached a
+        # chain the running claim sync follows (it would count it again)
+        if not follows_chain(result["chain"]):
+            if vote_request.vote:
+                claim.yes_votes += 1
+                claim.total_stake += vote_request.stake_amount
+            else:
+                claim.no_votes += 1
+                claim.total_stake += vote_request.stake_amount
+            
+            db.commit()
         
         return VoteSubmissionResponse(
             status="vote_submitted",
-            tx_id=tx_id
+            tx_id=result["tx_id"]
         )
         
     except HTTPException:
@@ -37,6 +37,15 @@ class PlaceBetResponse(BaseModel):
     avg_price: float
     potential_payout: float
 
+class MarketDepth(BaseModel):
+    market_id: int
+    position: str  # YES or NO
+    amounts: List[float]
+    shares: List[float]  # Shares each order size would buy
+    avg_prices: List[float]
+    price_impact: List[float]  # Average price over the marginal price, minus one
+    yes_prices: List[float]  # YES price after each order
+
 class MarketPosition(BaseModel):
     market_id: int
     position: str  # YES or NO
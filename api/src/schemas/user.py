@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BalancesRequest(BaseModel):
+    addresses: List[str] = Field(..., min_length=1, max_length=1000)
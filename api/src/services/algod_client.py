@@ -0,0 +1,179 @@
+import base64
+import logging
+from typing import Dict, Any, List, Optional
+
+import httpx
+from algosdk import encoding, transaction
+from algosdk.error import AlgodHTTPError, IndexerHTTPError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAlgodClient:
+    """
+    Non-blocking algod REST client
+
+    Mirrors the algod_client calls AlgorandService makes, but awaits them on
+    one pooled keep-alive httpx client instead of blocking the event loop
+    for a network round-trip.
+    """
+
+    def __init__(
+        self,
+        algod_address: str,
+        algod_token: str = "",
+        timeout: float = 10.0,
+        max_connections: int = 32
+    ):
+        self.client = httpx.AsyncClient(
+            base_url=algod_address.rstrip("/"),
+            headers={"X-Algo-API-Token": algod_token},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        response = await self.client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise AlgodHTTPError(message, response.status_code)
+        return response.json()
+
+    async def status(self) -> Dict[str, Any]:
+        return await self._request("GET", "/v2/status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        # algod holds this request open until the round is reached (or ~1 minute)
+        return await self._request("GET", f"/v2/status/wait-for-block-after/{block_num}", timeout=70.0)
+
+    async def block_txids(self, round_number: int) -> List[str]:
+        """Ids of every transaction confirmed in a round"""
+        result = await self._request("GET", f"/v2/blocks/{round_number}/txids")
+        return result.get("blockTxids") or []
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        params = await self._request("GET", "/v2/transactions/params")
+        return transaction.SuggestedParams(
+            fee=params["fee"],
+            first=params["last-round"],
+            last=params["last-round"] + 1000,
+            gh=params["genesis-hash"],
+            gen=params["genesis-id"],
+            flat_fee=False,
+            consensus_version=params.get("consensus-version"),
+            min_fee=params["min-fee"]
+        )
+
+    async def send_transaction(self, txn) -> str:
+        """Send one signed transaction; returns its id"""
+        return await self.send_transactions([txn])
+
+    async def send_transactions(self, txns: List[Any]) -> str:
+        """Send signed transactions (e.g. an atomic group); returns the first id"""
+        body = b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        result = await self._request(
+            "POST",
+            "/v2/transactions",
+            content=body,
+            headers={"Content-Type": "application/x-binary"}
+        )
+        return result["txId"]
+
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        return await self._request("GET", f"/v2/transactions/pending/{transaction_id}")
+
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        return await self._request("GET", f"/v2/applications/{application_id}")
+
+    async def application_box_by_name(self, application_id: int, box_name: bytes) -> Dict[str, Any]:
+        name = "b64:" + base64.b64encode(box_name).decode()
+        return await self._request("GET", f"/v2/applications/{application_id}/box", params={"name": name})
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class AsyncIndexerClient:
+    """Non-blocking indexer REST client on a pooled keep-alive httpx client"""
+
+    def __init__(
+        self,
+        indexer_address: str,
+        indexer_token: str = "",
+        timeout: float = 10.0,
+        max_connections: int = 8
+    ):
+        self.client = httpx.AsyncClient(
+            base_url=indexer_address.rstrip("/"),
+            headers={"X-Indexer-API-Token": indexer_token},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = await self.client.get(path, params=params)
+        if response.status_code >= 400:
+            raise IndexerHTTPError(response.text)
+        return response.json()
+
+    async def health(self) -> Dict[str, Any]:
+        return await self._get("/health")
+
+    async def search_transactions(
+        self,
+        application_id: Optional[int] = None,
+        min_round: Optional[int] = None,
+        max_round: Optional[int] = None,
+        next_page: Optional[str] = None,
+        limit: int = 1000,
+        tx_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        params = {
+            "application-id": application_id,
+            "min-round": min_round,
+            "max-round": max_round,
+            "tx-type": tx_type,
+            "next": next_page,
+            "limit": limit
+        }
+        return await self._get(
+            "/v2/transactions",
+            {key: value for key, value in params.items() if value is not None}
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# One pool per node address, shared by every AlgorandService in the process
+_algod_clients: Dict[str, AsyncAlgodClient] = {}
+_indexer_clients: Dict[str, AsyncIndexerClient] = {}
+
+
+def get_algod_client(address: str, token: str = "") -> AsyncAlgodClient:
+    if address not in _algod_clients:
+        _algod_clients[address] = AsyncAlgodClient(address, token)
+    return _algod_clients[address]
+
+
+def get_indexer_client(address: str, token: str = "") -> AsyncIndexerClient:
+    if address not in _indexer_clients:
+        _indexer_clients[address] = AsyncIndexerClient(address, token)
+    return _indexer_clients[address]
+
+
+async def close_clients():
+    """Close every pooled connection (on shutdown)"""
+    for client in list(_algod_clients.values()) + list(_indexer_clients.values()):
+        await client.aclose()
+    _algod_clients.clear()
+    _indexer_clients.clear()
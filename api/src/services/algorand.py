@@ -4,25 +4,51 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../contracts/src'))
 
 from algosdk import account, mnemonic
-from algosdk.v2client import algod, indexer
 from algosdk.transaction import ApplicationCallTxn, StateSchema, Transaction
-from algosdk.atomic_transaction_composer import AtomicTransactionComposer, TransactionWithSigner
 from algosdk.abi import Method, Contract
 from algosdk.logic import get_application_address
+import asyncio
 import base64
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Optional, List, Tuple
 from src.config import settings
+from src.services.algod_client import get_algod_client, get_indexer_client
+from src.services.confirmation import get_confirmation_tracker
+from src.services.params_cache import get_params_cache
+from src.services.claim_batcher import ClaimBatcher
+from src.services.chain_follower import get_chain_follower
+from src.services.box_cache import get_box_cache, claim_box, reputation_box
+from src.services.circuit_breaker import CircuitOpen, get_breaker
 import random
 
 logger = logging.getLogger(__name__)
 
+# Calls slower than this (in seconds) count against an endpoint's circuit;
+# submissions include waiting for confirmation
+SLOW_CALL_SECONDS = {
+    "submit_claim": 15.0,
+    "submit_vote": 15.0,
+    "opt_in": 15.0,
+    "get_claim": 1.0,
+    "get_balance": 1.0
+}
+
+
+def _is_node_failure(error: BaseException) -> bool:
+    """Whether an error says the node is unhealthy (4xx answers do not)"""
+    code = getattr(error, "code", None)
+    return not (isinstance(code, int) and 400 <= code < 500)
+
 # Try to import mock blockchain
 try:
-    from mock_blockchain import get_blockchain
-    USE_MOCK_BLOCKCHAIN = True
-    logger.info("Using mock blockchain implementation")
+    from mock_blockchain import get_blockchain, configure_blockchain
+    USE_MOCK_BLOCKCHAIN = settings.use_mock_blockchain
+    # The chain itself is only created on first use, and settles claims
+    # and markets at their deadlines
+    configure_blockchain(data_dir=settings.mock_chain_data_dir, storage=settings.mock_chain_storage, auto_settle=True)
+    if USE_MOCK_BLOCKCHAIN:
+        logger.info("Using mock blockchain implementation")
 except ImportError:
     USE_MOCK_BLOCKCHAIN = False
     logger.info("Mock blockchain not available, using fallback mock mode")
@@ -34,33 +60,26 @@ class AlgorandService:
         self.service_account = None
         self.mock_mode = True  # Start in mock mode
         
-        try:
-            # Try to initialize Algorand clients
-            self.algod_client = algod.AlgodClient(
-                algod_token="",
-                algod_address=settings.algorand_node_url
-            )
-            
-            self.indexer_client = indexer.IndexerClient(
-                indexer_token="",
-                indexer_address=settings.algorand_indexer_url
-            )
-            
-            # Test connection
-            self.algod_client.status()
-            self.mock_mode = False
-            logger.info("Connected to Algorand node")
-            
-            # Load service account only if connected
-            if settings.service_account_mnemonic != "your 25 word mnemonic here":
-                self.service_account = self._load_service_account()
-            else:
-                logger.warning("No service account configured, using mock mode")
-                self.mock_mode = True
-                
-        except Exception as e:
-            logger.warning(f"Cannot connect to Algorand, using mock mode: {e}")
-            self.mock_mode = True
+        # Pooled async clients, shared by every service instance; nothing is
+        # sent to the node until the first call
+        self.algod_client = get_algod_client(settings.algorand_node_url)
+        self.indexer_client = get_indexer_client(settings.algorand_indexer_url)
+        # Suggested params of the current round, kept fresh in the background
+        self.params_cache = get_params_cache(
+            settings.algorand_node_url,
+            congestion_multiplier=settings.congestion_fee_multiplier,
+            max_fee=settings.max_txn_fee
+        )
+        # Process-wide watcher that confirms every transaction we send
+        self.confirmations = get_confirmation_tracker(settings.algorand_node_url)
+        # Packs concurrent claim submissions into atomic groups
+        self.claim_batcher = ClaimBatcher(
+            self,
+            max_group_size=settings.claim_batch_size,
+            max_delay=settings.claim_batch_delay_ms / 1000
+        )
+        self._connected = False
+        self._connect_lock = asyncio.Lock()
         
         # Contract app IDs
         self.claim_registry_id = settings.claim_registry_app_id
@@ -68,11 +87,62 @@ class AlgorandService:
         self.validation_pool_id = settings.validation_pool_app_id
         self.prediction_market_id = settings.prediction_market_app_id
         
+        # Decoded box reads, invalidated by the contract events the
+        # follower sees on chain
+        self.chain_follower = get_chain_follower(
+            settings.algorand_indexer_url,
+            [self.claim_registry_id, self.reputation_token_id, self.validation_pool_id]
+        )
+        self.box_cache = get_box_cache(
+            self.chain_follower,
+            self.claim_registry_id,
+            self.reputation_token_id
+        )
+        
+        # Fast-fail per endpoint while the node is unhealthy
+        self.breakers = {
+            name: get_breaker(
+                name,
+                failure_rate=settings.breaker_failure_rate,
+                slow_call_seconds=slow_call_seconds,
+                slow_call_rate=settings.breaker_slow_call_rate,
+                window=settings.breaker_window,
+                min_calls=settings.breaker_min_calls,
+                open_seconds=settings.breaker_open_seconds,
+                is_failure=_is_node_failure
+            )
+            for name, slow_call_seconds in SLOW_CALL_SECONDS.items()
+        }
+        
         # Mock data storage
         self.mock_claims = {}
         self.mock_claim_counter = 0
         self.mock_user_balances = {}
     
+    async def _ensure_connected(self):
+        """Test the node connection once, on first use"""
+        if self._connected:
+            return
+        async with self._connect_lock:
+            if self._connected:
+                return
+            try:
+                await self.algod_client.status()
+                self.mock_mode = False
+                logger.info("Connected to Algorand node")
+                
+                # Load service account only if connected
+                if settings.service_account_mnemonic != "your 25 word mnemonic here":
+                    self.service_account = self._load_service_account()
+                else:
+                    logger.warning("No service account configured, using mock mode")
+                    self.mock_mode = True
+                    
+            except Exception as e:
+                logger.warning(f"Cannot connect to Algorand, using mock mode: {e}")
+                self.mock_mode = True
+            self._connected = True
+    
     def _load_service_account(self) -> Dict[str, str]:
         """Load service account from mnemonic"""
         try:
@@ -89,11 +159,12 @@ class AlgorandService:
     
     async def health_check(self) -> bool:
         """Check if Algorand node is accessible"""
+        await self._ensure_connected()
         if self.mock_mode:
             return True
             
         try:
-            status = self.algod_client.status()
+            status = await self.algod_client.status()
             return status.get("last-round", 0) > 0
         except:
             return False
@@ -107,11 +178,13 @@ class AlgorandService:
         Submit a claim to the blockchain
         Returns: claim_id and transaction_id
         """
+        await self._ensure_connected()
+        
         # Use mock blockchain if available
         if USE_MOCK_BLOCKCHAIN:
             try:
-                blockchain = get_blockchain()
-                result = blockchain.submit_claim(ipfs_hash, category)
+                blockchain = await asyncio.to_thread(get_blockchain)
+                result = await asyncio.to_thread(blockchain.submit_claim, ipfs_hash, category)
                 logger.info(f"[BLOCKCHAIN] Submitted claim: ID={result['claim_id']}, TX={result['tx_id']}")
                 return {
                     "claim_id": result["claim_id"],
@@ -122,66 +195,61 @@ class AlgorandService:
                 # Fall back to mock mode
         
         if self.mock_mode:
-            # Mock implementation
-            self.mock_claim_counter += 1
-            claim_id = self.mock_claim_counter
-            
-            self.mock_claims[claim_id] = {
-                "ipfs_hash": ipfs_hash,
-                "category": category,
-                "status": "UNVERIFIED"
-            }
-            
-            logger.info(f"[MOCK] Submitted claim to blockchain: ID={claim_id}")
-            
-            return {
-                "claim_id": claim_id,
-                "tx_id": f"mock_tx_{claim_id}_{random.randint(1000, 9999)}"
-            }
+            return self._mock_submit_claim(ipfs_hash, category)
         
         try:
-            # Real implementation
-            params = self.algod_client.suggested_params()
-            
-            txn = ApplicationCallTxn(
-                sender=self.service_account["address"],
-                sp=params,
-                index=self.claim_registry_id,
-                app_args=[
-                    b"submit_claim",
-                    ipfs_hash.encode(),
-                    category.encode()
-                ],
-                on_complete=0  # NoOp
-            )
+            async with self.breakers["submit_claim"].guard():
+                # Real implementation: sent as part of an atomic group with
+                # whatever other claims arrive at the same time
+                result = await self.claim_batcher.submit(ipfs_hash, category)
             
-            signed_txn = txn.sign(self.service_account["private_key"])
-            tx_id = self.algod_client.send_transaction(signed_txn)
+            logger.info(f"Submitted claim to blockchain: ID={result['claim_id']}, TX={result['tx_id']}")
             
-            result = self._wait_for_confirmation(tx_id)
-            claim_id = self._extract_claim_id(result)
-            
-            logger.info(f"Submitted claim to blockchain: ID={claim_id}, TX={tx_id}")
-            
-            return {
-                "claim_id": claim_id,
-                "tx_id": tx_id
-            }
+            return result
             
         except Exception as e:
-            logger.error(f"Failed to submit claim to blockchain: {e}")
-            # Fallback to mock
-            return await self.submit_claim_to_blockchain(ipfs_hash, category)
+            return self._degraded(e, "Failed to submit claim to blockchain", lambda: self._mock_submit_claim(ipfs_hash, category))
+    
+    def _mock_submit_claim(self, ipfs_hash: str, category: str) -> Dict[str, Any]:
+        """Mock implementation of submit_claim_to_blockchain"""
+        self.mock_claim_counter += 1
+        claim_id = self.mock_claim_counter
+        
+        self.mock_claims[claim_id] = {
+            "ipfs_hash": ipfs_hash,
+            "category": category,
+            "status": "UNVERIFIED"
+        }
+        
+        logger.info(f"[MOCK] Submitted claim to blockchain: ID={claim_id}")
+        
+        return {
+            "claim_id": claim_id,
+            "tx_id": f"mock_tx_{claim_id}_{random.randint(1000, 9999)}"
+        }
+    
+    def _degraded(self, error: Exception, message: str, fallback):
+        """
+        Answer a call whose node request failed, or whose circuit is open,
+        with the configured degraded behavior
+        """
+        if not isinstance(error, CircuitOpen):
+            logger.error(f"{message}: {error}")
+        if settings.algorand_degraded_mode == "fail":
+            raise error
+        return fallback()
     
     async def get_claim_from_blockchain(self, claim_id: int) -> Dict[str, Any]:
         """
         Retrieve claim data from blockchain
         """
+        await self._ensure_connected()
+        
         # Use mock blockchain if available
         if USE_MOCK_BLOCKCHAIN:
             try:
-                blockchain = get_blockchain()
-                claim = blockchain.get_claim(claim_id)
+                blockchain = await asyncio.to_thread(get_blockchain)
+                claim = await asyncio.to_thread(blockchain.get_claim, claim_id)
                 if claim:
                     return {
                         "ipfs_hash": claim["ipfs_hash"],
@@ -203,25 +271,32 @@ class AlgorandService:
         
         try:
             # Real implementation
-            box_name = f"claim_{claim_id}".encode()
-            
-            result = self.algod_client.application_box_by_name(
-                self.claim_registry_id,
-                box_name
-            )
-            
-            value = base64.b64decode(result["value"]).decode()
-            parts = value.split("|")
+            box_name = claim_box(claim_id)
+            
+            claim = self.box_cache.get(self.claim_registry_id, box_name)
+            if claim is None:
+                async with self.breakers["get_claim"].guard():
+                    result = await self.algod_client.application_box_by_name(
+                        self.claim_registry_id,
+                        box_name
+                    )
+                
+                value = base64.b64decode(result["value"]).decode()
+                parts = value.split("|")
+                
+                claim = {
+                    "ipfs_hash": parts[0],
+                    "category": parts[1],
+                    "status": parts[2] if len(parts) > 2 else "UNVERIFIED"
+                }
+                self.box_cache.put(self.claim_registry_id, box_name, claim, result.get("round"))
             
-            return {
-                "ipfs_hash": parts[0],
-                "category": parts[1],
-                "status": parts[2] if len(parts) > 2 else "UNVERIFIED"
-            }
+            return dict(claim)
             
         except Exception as e:
-            logger.error(f"Failed to get claim from blockchain: {e}")
-            if self.mock_mode and claim_id in self.mock_claims:
+            if not isinstance(e, CircuitOpen):
+                logger.error(f"Failed to get claim from blockchain: {e}")
+            if claim_id in self.mock_claims and settings.algorand_degraded_mode == "mock":
                 return self.mock_claims[claim_id]
             raise
     
@@ -230,19 +305,26 @@ class AlgorandService:
         claim_id: int,
         vote: bool,
         stake_amount: int,
-        voter_address: Optional[str] = None
-    ) -> str:
+        voter_address: Optional[str] = None,
+        wait_for_confirmation: bool = True
+    ) -> Dict[str, Any]:
         """
         Submit a vote for a claim
+        Without wait_for_confirmation the tx id is returned as soon as the
+        node accepts the transaction and the confirmation is pushed later.
+        Returns the tx id and the chain the vote reached: "mock_chain",
+        "algod", or "mock" when it was only recorded by the mock fallback.
         """
+        await self._ensure_connected()
+        
         # Use mock blockchain if available
         if USE_MOCK_BLOCKCHAIN:
             try:
-                blockchain = get_blockchain()
+                blockchain = await asyncio.to_thread(get_blockchain)
                 voter = voter_address or "default_voter"
-                result = blockchain.submit_vote(claim_id, voter, vote, stake_amount)
+                result = await asyncio.to_thread(blockchain.submit_vote, claim_id, voter, vote, stake_amount)
                 logger.info(f"[BLOCKCHAIN] Submitted vote: claim={claim_id}, vote={vote}, stake={stake_amount}")
-                return result["tx_id"]
+                return {"tx_id": result["tx_id"], "chain": "mock_chain"}
             except Exception as e:
                 logger.error(f"Blockchain vote error: {e}")
                 # Fall back to mock mode
@@ -250,45 +332,53 @@ class AlgorandService:
         if self.mock_mode:
             # Mock implementation
             logger.info(f"[MOCK] Submitted vote: claim={claim_id}, vote={vote}, stake={stake_amount}")
-            return f"mock_vote_tx_{claim_id}_{random.randint(1000, 9999)}"
+            return self._mock_vote(claim_id)
         
         try:
-            # Real implementation
-            sender = voter_address or self.service_account["address"]
-            params = self.algod_client.suggested_params()
-            
-            txn = ApplicationCallTxn(
-                sender=sender,
-                sp=params,
-                index=self.validation_pool_id,
-                app_args=[
-                    b"cast_vote",
-                    claim_id.to_bytes(8, 'big'),
-                    (1 if vote else 0).to_bytes(1, 'big'),
-                    stake_amount.to_bytes(8, 'big')
-                ],
-                foreign_apps=[self.reputation_token_id],
-                on_complete=0
-            )
-            
-            signed_txn = txn.sign(self.service_account["private_key"])
-            tx_id = self.algod_client.send_transaction(signed_txn)
-            
-            self._wait_for_confirmation(tx_id)
+            async with self.breakers["submit_vote"].guard():
+                # Real implementation
+                sender = voter_address or self.service_account["address"]
+                params = await self.params_cache.get()
+                
+                txn = ApplicationCallTxn(
+                    sender=sender,
+                    sp=params,
+                    index=self.validation_pool_id,
+                    app_args=[
+                        b"cast_vote",
+                        claim_id.to_bytes(8, 'big'),
+                        (1 if vote else 0).to_bytes(1, 'big'),
+                        stake_amount.to_bytes(8, 'big')
+                    ],
+                    foreign_apps=[self.reputation_token_id],
+                    on_complete=0
+                )
+                
+                signed_txn = txn.sign(self.service_account["private_key"])
+                tx_id = await self.algod_client.send_transaction(signed_txn)
+                
+                if wait_for_confirmation:
+                    await self._wait_for_confirmation(tx_id, params.last)
+                else:
+                    self.confirmations.track(tx_id, params.last)
             
             logger.info(f"Submitted vote: claim={claim_id}, vote={vote}, stake={stake_amount}")
             
-            return tx_id
+            return {"tx_id": tx_id, "chain": "algod"}
             
         except Exception as e:
-            logger.error(f"Failed to submit vote: {e}")
-            # Fallback to mock
-            return f"mock_vote_tx_{claim_id}_{random.randint(1000, 9999)}"
+            return self._degraded(e, "Failed to submit vote", lambda: self._mock_vote(claim_id))
+    
+    @staticmethod
+    def _mock_vote(claim_id: int) -> Dict[str, Any]:
+        return {"tx_id": f"mock_vote_tx_{claim_id}_{random.randint(1000, 9999)}", "chain": "mock"}
     
     async def get_user_balance(self, user_address: str) -> int:
         """
         Get user's reputation token balance
         """
+        await self._ensure_connected()
+        
         if self.mock_mode:
             # Mock implementation
             if user_address not in self.mock_user_balances:
@@ -297,54 +387,85 @@ class AlgorandService:
         
         try:
             # Real implementation
-            box_name = f"rep_{user_address}".encode()
-            
-            result = self.algod_client.application_box_by_name(
-                self.reputation_token_id,
-                box_name
-            )
-            
-            balance = int.from_bytes(base64.b64decode(result["value"]), 'big')
+            box_name = reputation_box(user_address)
+            
+            balance = self.box_cache.get(self.reputation_token_id, box_name)
+            if balance is None:
+                async with self.breakers["get_balance"].guard():
+                    result = await self.algod_client.application_box_by_name(
+                        self.reputation_token_id,
+                        box_name
+                    )
+                
+                balance = int.from_bytes(base64.b64decode(result["value"]), 'big')
+                self.box_cache.put(self.reputation_token_id, box_name, balance, result.get("round"))
             
             return balance
             
         except Exception as e:
-            logger.info(f"User {user_address} not found, returning 0 balance")
-            return 0
+            if not _is_node_failure(e):
+                logger.info(f"User {user_address} not found, returning 0 balance")
+                return 0
+            return self._degraded(e, f"Failed to get balance of {user_address}", lambda: 0)
     
-    async def opt_in_user(self, user_address: Optional[str] = None) -> Dict[str, Any]:
+    async def get_user_balances(
+        self,
+        addresses: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, int]]:
+        """
+        Get many users' reputation token balances
+        Yields (address, balance) pairs as they resolve, with at most
+        `max_concurrency` box reads in flight; cached boxes resolve at once.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.balance_lookup_concurrency)
+        
+        async def lookup(address: str) -> Tuple[str, int]:
+            async with semaphore:
+                return address, await self.get_user_balance(address)
+        
+        tasks = [asyncio.ensure_future(lookup(address)) for address in dict.fromkeys(addresses)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The consumer went away (e.g. the client disconnected)
+            for task in tasks:
+                task.cancel()
+    
+    async def opt_in_user(
+        self,
+        user_address: Optional[str] = None,
+        wait_for_confirmation: bool = True
+    ) -> Dict[str, Any]:
         """
         Opt in user to reputation system
         """
+        await self._ensure_connected()
+        
         if self.mock_mode:
-            # Mock implementation
-            address = user_address or "mock_user_address"
-            self.mock_user_balances[address] = settings.initial_reputation
-            
-            logger.info(f"[MOCK] Opted in user: {address}")
-            
-            return {
-                "status": "opted_in",
-                "tx_id": f"mock_optin_tx_{random.randint(1000, 9999)}",
-                "initial_balance": settings.initial_reputation
-            }
+            return self._mock_opt_in(user_address)
         
         try:
-            # Real implementation
-            sender = user_address or self.service_account["address"]
-            params = self.algod_client.suggested_params()
-            
-            txn = ApplicationCallTxn(
-                sender=sender,
-                sp=params,
-                index=self.reputation_token_id,
-                app_args=[b"opt_in"],
-                on_complete=0
-            )
-            
-            signed_txn = txn.sign(self.service_account["private_key"])
-            tx_id = self.algod_client.send_transaction(signed_txn)
-            self._wait_for_confirmation(tx_id)
+            async with self.breakers["opt_in"].guard():
+                # Real implementation
+                sender = user_address or self.service_account["address"]
+                params = await self.params_cache.get()
+                
+                txn = ApplicationCallTxn(
+                    sender=sender,
+                    sp=params,
+                    index=self.reputation_token_id,
+                    app_args=[b"opt_in"],
+                    on_complete=0
+                )
+                
+                signed_txn = txn.sign(self.service_account["private_key"])
+                tx_id = await self.algod_client.send_transaction(signed_txn)
+                if wait_for_confirmation:
+                    await self._wait_for_confirmation(tx_id, params.last)
+                else:
+                    self.confirmations.track(tx_id, params.last)
             
             return {
                 "status": "opted_in",
@@ -353,48 +474,45 @@ class AlgorandService:
             }
             
         except Exception as e:
-            logger.error(f"Failed to opt in user: {e}")
-            # Fallback to mock
-            return await self.opt_in_user(user_address)
+            return self._degraded(e, "Failed to opt in user", lambda: self._mock_opt_in(user_address))
+    
+    def _mock_opt_in(self, user_address: Optional[str]) -> Dict[str, Any]:
+        """Mock implementation of opt_in_user"""
+        address = user_address or "mock_user_address"
+        self.mock_user_balances[address] = settings.initial_reputation
+        
+        logger.info(f"[MOCK] Opted in user: {address}")
+        
+        return {
+            "status": "opted_in",
+            "tx_id": f"mock_optin_tx_{random.randint(1000, 9999)}",
+            "initial_balance": settings.initial_reputation
+        }
     
-    def _wait_for_confirmation(self, tx_id: str, timeout: int = 10):
+    async def _wait_for_confirmation(self, tx_id: str, last_valid: Optional[int] = None):
         """Wait for transaction confirmation"""
         if self.mock_mode:
             return {"confirmed-round": 1}
-            
-        last_round = self.algod_client.status()["last-round"]
-        
-        while timeout > 0:
-            try:
-                pending_txn = self.algod_client.pending_transaction_info(tx_id)
-                if pending_txn.get("confirmed-round", 0) > 0:
-                    return pending_txn
-                if pending_txn.get("pool-error"):
-                    raise Exception(f"Transaction rejected: {pending_txn['pool-error']}")
-            except Exception as e:
-                if "not found" not in str(e):
-                    raise
-            
-            last_round += 1
-            self.algod_client.status_after_block(last_round)
-            timeout -= 1
         
-        raise Exception(f"Transaction {tx_id} not confirmed after timeout")
+        return await self.confirmations.wait(tx_id, last_valid)
     
-    def _extract_claim_id(self, txn_result: Dict) -> int:
+    async def _extract_claim_id(self, txn_result: Dict) -> int:
         """Extract claim ID from transaction logs"""
         if self.mock_mode:
             return self.mock_claim_counter
             
         try:
             if "logs" in txn_result:
-                for log in txn_result["logs"]:
-                    decoded = base64.b64decode(log).decode('utf-8')
-                    if decoded.startswith("claim_id:"):
-                        return int(decoded.split(":")[1])
+                logs = [base64.b64decode(log) for log in txn_result["logs"]]
+                for index, log in enumerate(logs):
+                    # ClaimRegistry logs the event name, then op.itob(claim_id)
+                    if log == b"ClaimSubmitted" and index + 1 < len(logs):
+                        return int.from_bytes(logs[index + 1], 'big')
+                    if log.startswith(b"claim_id:"):
+                        return int(log.split(b":")[1])
             
             # Fallback: calculate from global state
-            app_info = self.algod_client.application_info(self.claim_registry_id)
+            app_info = await self.algod_client.application_info(self.claim_registry_id)
             global_state = app_info["params"]["global-state"]
             for item in global_state:
                 key = base64.b64decode(item["key"]).decode()
@@ -0,0 +1,108 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.services.chain_follower import ChainFollower
+
+logger = logging.getLogger(__name__)
+
+# Events that change a claim box, and those that change a reputation box
+CLAIM_EVENTS = {"ClaimStatusUpdated", "EmergencyFlag", "ValidationResolved"}
+REPUTATION_EVENTS = {
+    "ValidatorOptedIn",
+    "ReputationStaked",
+    "ReputationSlashed",
+    "ReputationRewarded",
+    "StakeReleased",
+    "EmergencyMint"
+}
+
+
+def claim_box(claim_id: int) -> bytes:
+    # The registry keys claims by "claim_" + itob(claim_id)
+    return b"claim_" + claim_id.to_bytes(8, "big")
+
+
+def reputation_box(address: str) -> bytes:
+    return f"rep_{address}".encode()
+
+
+class BoxCache:
+    """
+    Bounded LRU of decoded box values, tagged with the round they were read at
+
+    Entries are not expired by time: the chain follower invalidates a box
+    when an event that changes it is confirmed after the round the entry
+    was read at. The cache is only consulted while the follower is
+    healthy, and only stores reads at least as recent as the last round
+    the follower processed, so an entry can never miss an invalidation.
+    """
+
+    def __init__(
+        self,
+        follower: ChainFollower,
+        claim_registry_id: int,
+        reputation_token_id: int,
+        max_entries: int = 10000
+    ):
+        self.follower = follower
+        self.claim_registry_id = claim_registry_id
+        self.reputation_token_id = reputation_token_id
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, bytes], Tuple[Any, int]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        follower.add_handler(self._on_round)
+
+    def get(self, app_id: int, name: bytes) -> Optional[Any]:
+        """Cached value of a box, or None"""
+        self.follower.start()
+        if not self.follower.healthy:
+            self.stats["misses"] += 1
+            return None
+
+        entry = self._entries.get((app_id, name))
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end((app_id, name))
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, app_id: int, name: bytes, value: Any, read_round: Optional[int]):
+        """Store a value read from the node at `read_round`"""
+        processed = self.follower.processed_round
+        if read_round is None or processed is None or read_round < processed:
+            # Events between the read and what the follower has seen would be missed
+            return
+
+        self._entries[(app_id, name)] = (value, read_round)
+        self._entries.move_to_end((app_id, name))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, app_id: int, name: bytes, at_round: int):
+        """Drop a box if it was read before `at_round`"""
+        entry = self._entries.get((app_id, name))
+        if entry is not None and entry[1] < at_round:
+            del self._entries[(app_id, name)]
+            self.stats["invalidations"] += 1
+
+    async def _on_round(self, round_number: int, events: List[Dict[str, Any]]):
+        for event in events:
+            if event["type"] in CLAIM_EVENTS:
+                self.invalidate(self.claim_registry_id, claim_box(event["claim_id"]), round_number)
+            elif event["type"] in REPUTATION_EVENTS:
+                self.invalidate(self.reputation_token_id, reputation_box(event["address"]), round_number)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "follower_healthy": self.follower.healthy}
+
+
+# One cache per follower, shared by every AlgorandService in the process
+_caches: Dict[ChainFollower, BoxCache] = {}
+
+
+def get_box_cache(follower: ChainFollower, claim_registry_id: int, reputation_token_id: int) -> BoxCache:
+    if follower not in _caches:
+        _caches[follower] = BoxCache(follower, claim_registry_id, reputation_token_id)
+    return _caches[follower]
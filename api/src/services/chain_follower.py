@@ -0,0 +1,221 @@
+import asyncio
+import base64
+import logging
+import time
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from algosdk import encoding
+
+from src.services.algod_client import AsyncIndexerClient, get_indexer_client
+
+logger = logging.getLogger(__name__)
+
+# Fields the contracts log after each event name, in order
+EVENT_FIELDS = {
+    "ClaimSubmitted": [("claim_id", "uint")],
+    "ClaimStatusUpdated": [("claim_id", "uint"), ("status", "status")],
+    "EmergencyFlag": [("claim_id", "uint"), ("reason", "text")],
+    "ValidationCreated": [("claim_id", "uint"), ("duration", "uint")],
+    "VoteCast": [("claim_id", "uint"), ("voter", "address"), ("vote", "bool"), ("stake", "uint")],
+    "ValidationResolved": [("claim_id", "uint")],
+    "RewardsDistributed": [("claim_id", "uint"), ("validators", "uint")],
+    "ValidatorOptedIn": [("address", "address")],
+    "ReputationStaked": [("address", "address"), ("claim_id", "uint"), ("amount", "uint")],
+    "ReputationSlashed": [("address", "address"), ("amount", "uint")],
+    "ReputationRewarded": [("address", "address"), ("amount", "uint")],
+    "StakeReleased": [("address", "address"), ("claim_id", "uint")],
+    "EmergencyMint": [("address", "address"), ("amount", "uint")]
+}
+
+# ClaimRegistry's numeric ClaimStatus mapped to the API's statuses
+CLAIM_STATUSES = {0: "UNVERIFIED", 1: "UNVERIFIED", 2: "VERIFIED", 3: "DISPUTED", 4: "FALSE"}
+
+RoundHandler = Callable[[int, List[Dict[str, Any]]], Awaitable[None]]
+
+
+def _decode_field(kind: str, raw: bytes) -> Any:
+    if kind == "uint":
+        return int.from_bytes(raw, 'big')
+    if kind == "bool":
+        return bool(int.from_bytes(raw, 'big'))
+    if kind == "status":
+        return CLAIM_STATUSES.get(int.from_bytes(raw, 'big'), "UNVERIFIED")
+    if kind == "address":
+        return encoding.encode_address(raw) if len(raw) == 32 else raw.decode(errors="replace")
+    return raw.decode(errors="replace")
+
+
+def decode_logs(logs: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Contract events in an app call's (base64) logs
+    Each event is its name followed by its fields; anything that does not
+    match a known event is skipped.
+    """
+    raw = [base64.b64decode(log) for log in logs]
+    events = []
+    index = 0
+    while index < len(raw):
+        name = raw[index].decode(errors="replace")
+        fields = EVENT_FIELDS.get(name)
+        if fields is None or index + len(fields) >= len(raw):
+            index += 1
+            continue
+        event = {"type": name}
+        for offset, (field, kind) in enumerate(fields, start=1):
+            event[field] = _decode_field(kind, raw[index + offset])
+        events.append(event)
+        index += 1 + len(fields)
+    return events
+
+
+class ChainFollower:
+    """
+    Streams contract events from the indexer, round by round
+
+    Polls the indexer for application calls to `app_ids` confirmed since
+    the last round processed, decodes their logs and hands each round's
+    events to the registered handlers in round order. Handlers are called
+    for every round that has events, and for the last round of each batch
+    even without any, so they can checkpoint progress. A round may be
+    handed out again after a handler fails, so handlers must skip rounds
+    they have already applied. A handler still failing a round after
+    `max_handler_attempts` tries is skipped for that round, so it cannot
+    stall the other handlers.
+    """
+
+    def __init__(
+        self,
+        indexer_client: AsyncIndexerClient,
+        app_ids: Iterable[int],
+        start_round: Optional[int] = None,
+        poll_interval: float = 1.0,
+        batch_rounds: int = 1000,
+        max_lag: int = 2,
+        max_handler_attempts: int = 5
+    ):
+        self.indexer_client = indexer_client
+        self.app_ids = {app_id for app_id in app_ids if app_id}
+        self.processed_round = start_round
+        self.tip_round = 0
+        self.poll_interval = poll_interval
+        self.batch_rounds = batch_rounds
+        self.max_lag = max_lag
+        self.max_handler_attempts = max_handler_attempts
+        self._handlers: List[RoundHandler] = []
+        self._failures: Dict[Tuple[RoundHandler, int], int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_poll = 0.0
+
+    def add_handler(self, handler: RoundHandler):
+        """Call `await handler(round, events)` as rounds are processed"""
+        self._handlers.append(handler)
+
+    def start(self):
+        """Start following (from the running event loop); no-op if running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def healthy(self) -> bool:
+        """Whether every event up to (nearly) the indexer's tip has been handled"""
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self.processed_round is not None
+            and time.monotonic() - self._last_poll < max(10.0, 5 * self.poll_interval)
+            and self.tip_round - self.processed_round <= self.max_lag
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                health = await self.indexer_client.health()
+                self.tip_round = health["round"]
+                self._last_poll = time.monotonic()
+                if self.processed_round is None:
+                    # Nothing to catch up on: start from the current round
+                    self.processed_round = self.tip_round
+                if self.tip_round > self.processed_round:
+                    await self._process(self.processed_round + 1, min(self.tip_round, self.processed_round + self.batch_rounds))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Chain follower poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, min_round: int, max_round: int):
+        # Events of each transaction by (round, position in the round), so
+        # that the per-app queries merge back into chain order
+        transactions: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for watched_app in self.app_ids:
+            next_page = None
+            while True:
+                page = await self.indexer_client.search_transactions(
+                    application_id=watched_app,
+                    min_round=min_round,
+                    max_round=max_round,
+                    tx_type="appl",
+                    next_page=next_page
+                )
+                for txn in page.get("transactions", []):
+                    position = (txn["confirmed-round"], txn.get("intra-round-offset", 0))
+                    if position in transactions:
+                        # Calls more than one watched app: already decoded
+                        continue
+                    events = transactions[position] = []
+                    for call in [txn] + txn.get("inner-txns", []):
+                        app_id = call.get("application-transaction", {}).get("application-id")
+                        if app_id not in self.app_ids or not call.get("logs"):
+                            continue
+                        for event in decode_logs(call["logs"]):
+                            event.update(round=txn["confirmed-round"], tx_id=txn.get("id"), app_id=app_id)
+                            events.append(event)
+                next_page = page.get("next-token")
+                if not next_page or not page.get("transactions"):
+                    break
+
+        rounds: Dict[int, List[Dict[str, Any]]] = {}
+        for (round_number, _), events in sorted(transactions.items()):
+            rounds.setdefault(round_number, []).extend(events)
+        rounds.setdefault(max_round, [])
+        for round_number in sorted(rounds):
+            # A failing handler stops the follower at this round; it is
+            # retried (with every handler) on the next poll
+            for handler in self._handlers:
+                try:
+                    await handler(round_number, rounds[round_number])
+                except Exception as e:
+                    attempts = self._failures.get((handler, round_number), 0) + 1
+                    if attempts < self.max_handler_attempts:
+                        self._failures[(handler, round_number)] = attempts
+                        raise
+                    logger.error(f"Skipping round {round_number} for handler {handler!r} after {attempts} failures: {e}")
+            self._failures.clear()
+            self.processed_round = round_number
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# One follower per indexer address, shared by every AlgorandService in the process
+_followers: Dict[str, ChainFollower] = {}
+
+
+def get_chain_follower(address: str, app_ids: Iterable[int], token: str = "") -> ChainFollower:
+    if address not in _followers:
+        _followers[address] = ChainFollower(get_indexer_client(address, token), app_ids)
+    return _followers[address]
+
+
+async def close_followers():
+    """Stop every follower (on shutdown)"""
+    for follower in _followers.values():
+        await follower.close()
+    _followers.clear()
@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """A call was rejected because its circuit is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one kind of node call
+
+    Keeps the outcome of the last `window` calls. Once at least `min_calls`
+    have been made, the circuit opens if the share of failed calls reaches
+    `failure_rate` or the share of calls slower than `slow_call_seconds`
+    reaches `slow_call_rate`. While open every call is rejected at once
+    with CircuitOpen. After `open_seconds` the circuit is half-open and
+    lets `half_open_probes` calls through: if they all succeed in time it
+    closes again, otherwise it reopens. Exceptions for which `is_failure`
+    returns False (e.g. a 404 for a missing box) count as successes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 2.0,
+        slow_call_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        is_failure: Optional[Callable[[BaseException], bool]] = None
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.is_failure = is_failure or (lambda error: True)
+
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=window)  # (failed, slow) per call
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_ok = 0
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "times_opened": 0}
+
+    def _allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+            self._probe_ok = 0
+            logger.info(f"Circuit {self.name} half-open, probing")
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                return False
+            self._probes += 1
+        return True
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.stats["times_opened"] += 1
+        logger.warning(f"Circuit {self.name} opened: {self.get_stats()}")
+
+    def _record(self, duration: float, failed: bool):
+        slow = duration >= self.slow_call_seconds
+        self.stats["calls"] += 1
+        self.stats["failures"] += failed
+        self.stats["slow_calls"] += slow
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+                return
+            self._probe_ok += 1
+            if self._probe_ok >= self.half_open_probes:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit {self.name} closed")
+            return
+
+        self._outcomes.append((failed, slow))
+        if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate:
+                self._open()
+
+    def _rates(self):
+        if not self._outcomes:
+            return 0.0, 0.0
+        total = len(self._outcomes)
+        return (
+            sum(failed for failed, _ in self._outcomes) / total,
+            sum(slow for _, slow in self._outcomes) / total
+        )
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Run the body as one call through the breaker
+        Raises CircuitOpen without running it while the circuit is open.
+        """
+        if not self._allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpen(self.name)
+
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._record(time.monotonic() - start, self.is_failure(e))
+            raise
+        except BaseException:
+            # Cancelled: no outcome, but give back a half-open probe slot
+            if self.state == HALF_OPEN:
+                self._probes -= 1
+            raise
+        else:
+            self._record(time.monotonic() - start, False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        return {
+            **self.stats,
+            "state": self.state,
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3)
+        }
+
+
+# Breakers by name, shared by every AlgorandService in the process
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, **options)
+    return _breakers[name]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every breaker"""
+    return {name: breaker.get_stats() for name, breaker in _breakers.items()}
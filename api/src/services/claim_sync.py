@@ -0,0 +1,350 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.config import settings
+from src.database import SessionLocal
+from src.models.claim import Claim
+from src.models.sync import SyncCheckpoint
+from src.services.algorand import USE_MOCK_BLOCKCHAIN
+from src.services.chain_follower import ChainFollower
+
+logger = logging.getLogger(__name__)
+
+# Events that change a row of the claims table
+SYNCED_EVENTS = {"ClaimSubmitted", "VoteCast", "ClaimStatusUpdated", "ValidationResolved"}
+
+# Times a round is retried while claim boxes it needs cannot be read,
+# before those events are set aside and the rest of the round applied
+MAX_BOX_READ_ATTEMPTS = 3
+# Events set aside at most; the oldest are dropped beyond this
+MAX_DEFERRED_EVENTS = 1000
+
+
+class ClaimSync:
+    """
+    Applies chain events to the claims table
+
+    Each call to apply() writes one round's (or event batch's) changes in
+    a single transaction together with the source's checkpoint, so a
+    batch is applied exactly once even if it is handed out again after a
+    crash or a failed commit. Vote events are applied as deltas; events
+    carrying a `claim` snapshot (from the mock chain) set the counts
+    outright. Claims the table has not seen yet are created from their
+    ClaimSubmitted event with a placeholder title; one whose IPFS hash
+    already belongs to another claim (the column is unique) is logged and
+    skipped rather than failing the batch.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.stats = {"batches": 0, "events": 0, "created": 0, "skipped": 0}
+
+    def checkpoint(self) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            checkpoint = db.get(SyncCheckpoint, self.source)
+            return checkpoint.position if checkpoint else None
+        finally:
+            db.close()
+
+    def apply(self, position: int, events: List[Dict[str, Any]], reset: bool = False) -> int:
+        """
+        Apply the events of one batch ending at `position`
+        Batches at or before the checkpoint are skipped unless `reset` (used
+        when resynchronising from a snapshot). Returns the events applied.
+        """
+        db = SessionLocal()
+        try:
+            checkpoint = db.get(SyncCheckpoint, self.source)
+            if checkpoint is not None and position <= checkpoint.position and not reset:
+                return 0
+
+            events = [event for event in events if event["type"] in SYNCED_EVENTS]
+            claim_ids = {event["claim_id"] for event in events}
+            claims = {}
+            if claim_ids:
+                claims = {
+                    claim.claim_id: claim
+                    for claim in db.query(Claim).filter(Claim.claim_id.in_(claim_ids))
+                }
+
+            # Claims holding the IPFS hashes of the claims about to be created
+            hashes = {
+                event["ipfs_hash"] for event in events
+                if event["claim_id"] not in claims and event.get("ipfs_hash")
+            }
+            hash_owners = {}
+            if hashes:
+                hash_owners = {
+                    ipfs_hash: claim_id
+                    for ipfs_hash, claim_id in db.query(Claim.ipfs_hash, Claim.claim_id).filter(Claim.ipfs_hash.in_(hashes))
+                }
+
+            for event in events:
+                claim = claims.get(event["claim_id"])
+                if claim is None:
+                    claim = self._new_claim(event)
+                    if claim is None:
+                        continue
+                    owner = hash_owners.setdefault(claim.ipfs_hash, claim.claim_id)
+                    if owner != claim.claim_id:
+                        logger.warning(
+                            f"Not syncing claim {claim.claim_id}: IPFS hash {claim.ipfs_hash} "
+                            f"already belongs to claim {owner}"
+                        )
+                        self.stats["skipped"] += 1
+                        continue
+                    db.add(claim)
+                    claims[claim.claim_id] = claim
+                    self.stats["created"] += 1
+                self._apply_event(claim, event)
+
+            if checkpoint is None:
+                db.add(SyncCheckpoint(source=self.source, position=position))
+            else:
+                checkpoint.position = position
+            db.commit()
+
+            self.stats["batches"] += 1
+            self.stats["events"] += len(events)
+            return len(events)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _new_claim(self, event: Dict[str, Any]) -> Optional[Claim]:
+        if event["type"] != "ClaimSubmitted" or not event.get("ipfs_hash"):
+            return None
+        return Claim(
+            claim_id=event["claim_id"],
+            title=f"Claim #{event['claim_id']}",
+            content="",
+            category=event.get("category") or "news",
+            status="UNVERIFIED",
+            ipfs_hash=event["ipfs_hash"],
+            tx_id=event.get("tx_id"),
+            yes_votes=0,
+            no_votes=0,
+            total_stake=0,
+            voting_ends_at=datetime.utcnow() + timedelta(seconds=settings.voting_period_seconds)
+        )
+
+    @staticmethod
+    def _apply_event(claim: Claim, event: Dict[str, Any]):
+        snapshot = event.get("claim")
+        if snapshot is not None:
+            claim.status = snapshot["status"]
+            claim.yes_votes = snapshot["yes_votes"]
+            claim.no_votes = snapshot["no_votes"]
+            claim.total_stake = snapshot["total_stake"]
+        elif event["type"] == "VoteCast":
+            if event["vote"]:
+                claim.yes_votes = (claim.yes_votes or 0) + 1
+            else:
+                claim.no_votes = (claim.no_votes or 0) + 1
+            claim.total_stake = (claim.total_stake or 0) + event["stake"]
+        elif event.get("status"):
+            claim.status = event["status"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "source": self.source}
+
+
+class IndexerClaimSync:
+    """
+    Keeps the claims table in sync from the indexer's chain follower
+
+    The logs carry claim ids only, so the fields the table needs are read
+    from the claim boxes. A round whose boxes cannot be read is retried a
+    few times; after that its other events are applied and the unreadable
+    ones are set aside and retried with each later round, so one bad box
+    never stalls the follower the box cache shares.
+    """
+
+    # Chain (as reported by AlgorandService.submit_vote) whose events this sync applies
+    chain = "algod"
+
+    def __init__(self, sync: ClaimSync, follower: ChainFollower, service):
+        self.sync = sync
+        self.follower = follower
+        self.service = service
+        self.applied_round: Optional[int] = None
+        self._attempts: Dict[int, int] = {}
+        self._deferred: Dict[Tuple[int, str], Dict[str, Any]] = {}
+
+    async def start(self):
+        checkpoint = await asyncio.to_thread(self.sync.checkpoint)
+        self.applied_round = checkpoint
+        if checkpoint is not None and self.follower.processed_round is None:
+            # Resume where the last run stopped
+            self.follower.processed_round = checkpoint
+        self.follower.add_handler(self._on_round)
+        self.follower.start()
+
+    @staticmethod
+    def _needs_box(event: Dict[str, Any]) -> bool:
+        return event["type"] == "ClaimSubmitted" or (event["type"] == "ValidationResolved" and not event.get("status"))
+
+    async def _read_box(self, event: Dict[str, Any]) -> bool:
+        """Add the claim box's fields to an event; False if it cannot be read"""
+        try:
+            box = await self.service.get_claim_from_blockchain(event["claim_id"])
+        except Exception as e:
+            logger.warning(f"Cannot read claim {event['claim_id']} for sync: {e}")
+            return False
+        event.setdefault("ipfs_hash", box["ipfs_hash"])
+        event.setdefault("category", box["category"])
+        event.setdefault("status", box["status"])
+        return True
+
+    async def _on_round(self, round_number: int, events: List[Dict[str, Any]]):
+        if self.applied_round is not None and round_number <= self.applied_round:
+            # Handed out again because another handler failed
+            return
+
+        # Copies: the follower hands the same events to every handler
+        events = [dict(event) for event in events if event["type"] in SYNCED_EVENTS]
+        unread = [event for event in events if self._needs_box(event) and not await self._read_box(event)]
+        if unread:
+            attempts = self._attempts.get(round_number, 0) + 1
+            if attempts < MAX_BOX_READ_ATTEMPTS:
+                # Nothing of the round is applied or checkpointed; the
+                # follower retries it on its next poll
+                self._attempts = {round_number: attempts}
+                raise Exception(f"Cannot read {len(unread)} claim boxes of round {round_number}")
+            logger.error(f"Setting aside {len(unread)} events of round {round_number} until their claim boxes can be read")
+            events = [event for event in events if all(event is not other for other in unread)]
+
+        # Events set aside earlier go first, once their boxes can be read
+        ready = [event for event in self._deferred.values() if await self._read_box(event)]
+        await asyncio.to_thread(self.sync.apply, round_number, ready + events)
+
+        self.applied_round = round_number
+        self._attempts.pop(round_number, None)
+        for event in ready:
+            del self._deferred[(event["claim_id"], event["type"])]
+        for event in unread:
+            self._deferred[(event["claim_id"], event["type"])] = event
+        while len(self._deferred) > MAX_DEFERRED_EVENTS:
+            claim_id, event_type = next(iter(self._deferred))
+            logger.error(f"Dropping {event_type} of claim {claim_id}: its box could not be read")
+            del self._deferred[(claim_id, event_type)]
+
+    async def close(self):
+        pass
+
+
+class MockChainClaimSync:
+    """
+    Keeps the claims table in sync from the mock blockchain's event stream
+
+    The mock chain's event log does not survive restarts, so the table is
+    first reconciled from a snapshot of every claim; events are then
+    applied with a fresh snapshot of each claim they touch, which makes
+    replays harmless.
+    """
+
+    chain = "mock_chain"
+
+    def __init__(self, sync: ClaimSync, get_blockchain, batch_size: int = 500):
+        self.sync = sync
+        self.get_blockchain = get_blockchain
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _reconcile(self, chain) -> int:
+        """Apply a snapshot of every claim; returns the event seq to resume from"""
+        next_seq = chain.get_status()["next_event_seq"]
+        after_id = 0
+        while True:
+            claims = chain.get_claims(after_id=after_id, limit=500)
+            if not claims:
+                break
+            self.sync.apply(next_seq - 1, [self._snapshot_event(claim) for claim in claims], reset=True)
+            after_id = claims[-1]["claim_id"]
+        self.sync.apply(next_seq - 1, [], reset=True)
+        return next_seq
+
+    @staticmethod
+    def _snapshot_event(claim: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "ClaimSubmitted",
+            "claim_id": claim["claim_id"],
+            "ipfs_hash": claim["ipfs_hash"],
+            "category": claim["category"],
+            "claim": claim
+        }
+
+    def _apply_events(self, chain, events: List[Dict[str, Any]]):
+        snapshots = {}
+        for event in events:
+            if event["type"] in SYNCED_EVENTS and event["claim_id"] not in snapshots:
+                snapshots[event["claim_id"]] = chain.get_claim(event["claim_id"])
+        # Copies: the events are shared with the chain's event log
+        events = [
+            {**event, "claim": snapshots[event["claim_id"]]}
+            if event["type"] in SYNCED_EVENTS and snapshots.get(event["claim_id"]) else event
+            for event in events
+        ]
+        self.sync.apply(events[-1]["seq"], events)
+
+    async def _run(self):
+        chain = await asyncio.to_thread(self.get_blockchain)
+        seq = None
+        while True:
+            try:
+                if seq is None:
+                    seq = await asyncio.to_thread(self._reconcile, chain)
+                events = await asyncio.to_thread(chain.get_events, seq, self.batch_size, 1.0)
+                if events:
+                    await asyncio.to_thread(self._apply_events, chain, events)
+                    seq = events[-1]["seq"] + 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Including falling behind the event log: resynchronise
+                logger.warning(f"Claim sync failed, resynchronising: {e}")
+                seq = None
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# The sync started by start_claim_sync, if any
+_runner = None
+
+
+def follows_chain(chain: str) -> bool:
+    """Whether a running claim sync applies the events of `chain`"""
+    return _runner is not None and _runner.chain == chain
+
+
+async def start_claim_sync(service):
+    """Start syncing the claims table from the chain the service uses"""
+    global _runner
+    if USE_MOCK_BLOCKCHAIN:
+        from mock_blockchain import get_blockchain
+        runner = MockChainClaimSync(ClaimSync("mock_chain"), get_blockchain)
+    else:
+        runner = IndexerClaimSync(
+            ClaimSync(f"indexer:{settings.algorand_indexer_url}"),
+            service.chain_follower,
+            service
+        )
+    await runner.start()
+    _runner = runner
+    return runner
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Set
+
+from src.services.algod_client import AsyncAlgodClient, get_algod_client
+
+logger = logging.getLogger(__name__)
+
+# Rounds re-scanned when the watcher wakes up, in case a transaction was
+# confirmed between being sent and being tracked
+REWIND_ROUNDS = 2
+
+
+class ConfirmationTracker:
+    """
+    One background watcher for every pending transaction in the process
+
+    Instead of each request polling pending_transaction_info and
+    status_after_block on its own, callers register a tx id and get a
+    future. The watcher follows new rounds once, lists each round's
+    transaction ids with a single call and resolves the futures of every
+    tracked id it finds, so polling grows with rounds rather than with
+    in-flight transactions. Each transaction still costs one
+    pending_transaction_info call when it is tracked (it may already be
+    confirmed in a round the watcher has scanned) and one when it is found
+    in a block (its caller needs the logs); it is also looked up once it
+    outlives `max_rounds` or `timeout_seconds`. The watcher waits for a new
+    round at most `poll_seconds` at a time, so the timeout holds on an idle
+    chain.
+    """
+
+    def __init__(
+        self,
+        algod_client: AsyncAlgodClient,
+        max_rounds: int = 10,
+        timeout_seconds: float = 60.0,
+        poll_seconds: float = 5.0
+    ):
+        self.algod_client = algod_client
+        self.max_rounds = max_rounds
+        self.timeout_seconds = timeout_seconds
+        self.poll_seconds = poll_seconds
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], Awaitable[None]]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lookups: Set[asyncio.Task] = set()
+        self.last_round = 0
+        self.stats = {"tracked": 0, "confirmed": 0, "failed": 0, "rounds_scanned": 0}
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+        """Call `await callback(tx_id, result)` for every transaction confirmed"""
+        self._listeners.append(callback)
+
+    def track(self, tx_id: str, last_valid: Optional[int] = None) -> asyncio.Future:
+        """
+        Future resolving to the pending transaction info of `tx_id` once it
+        is confirmed, or failing if it is rejected or not confirmed in time
+        """
+        entry = self._pending.get(tx_id)
+        if entry is not None:
+            return entry["future"]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Retrieve the exception of futures nobody awaits (fire-and-forget
+        # submissions) so that it is logged here rather than on garbage collection
+        future.add_done_callback(self._log_failure)
+        self._pending[tx_id] = {
+            "future": future,
+            "last_valid": last_valid,
+            "deadline": None,
+            "started": loop.time()
+        }
+        self.stats["tracked"] += 1
+
+        # It may already be confirmed in a round the watcher has scanned
+        lookup = loop.create_task(self._resolve(tx_id))
+        self._lookups.add(lookup)
+        lookup.add_done_callback(self._lookups.discard)
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    async def wait(self, tx_id: str, last_valid: Optional[int] = None) -> Dict[str, Any]:
+        """Await the confirmation of `tx_id`"""
+        # Shielded so a cancelled request does not cancel other waiters
+        return await asyncio.shield(self.track(tx_id, last_valid))
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Transaction not confirmed: {future.exception()}")
+
+    async def _run(self):
+        idle = True
+        while True:
+            if not self._pending:
+                idle = True
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            try:
+                if idle:
+                    # Resume from the current round after being idle
+                    status = await self.algod_client.status()
+                    self.last_round = max(0, status["last-round"] - REWIND_ROUNDS)
+                    idle = False
+                await self._scan()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Confirmation watcher error: {e}")
+                await asyncio.sleep(1)
+
+    async def _scan(self):
+        """Process every round up to the node's latest, then wait for the next"""
+        try:
+            status = await asyncio.wait_for(
+                self.algod_client.status_after_block(self.last_round), self.poll_seconds
+            )
+            latest = status["last-round"]
+        except asyncio.TimeoutError:
+            # No new round yet: still enforce the wall-clock timeout
+            latest = self.last_round
+
+        for round_number in range(self.last_round + 1, latest + 1):
+            txids = await self.algod_client.block_txids(round_number)
+            self.stats["rounds_scanned"] += 1
+            found = [tx_id for tx_id in txids if tx_id in self._pending]
+            if found:
+                await asyncio.gather(*(self._resolve(tx_id) for tx_id in found))
+            self.last_round = round_number
+
+        # Look up anything that has gone `max_rounds` rounds (past its
+        # validity window, or `timeout_seconds`) without showing up in a block
+        overdue = []
+        now = asyncio.get_running_loop().time()
+        for tx_id, entry in self._pending.items():
+            if entry["deadline"] is None:
+                entry["deadline"] = latest + self.max_rounds
+            if (
+                latest >= entry["deadline"]
+                or (entry["last_valid"] and latest > entry["last_valid"])
+                or now - entry["started"] >= self.timeout_seconds
+            ):
+                overdue.append(tx_id)
+        if overdue:
+            await asyncio.gather(*(self._resolve(tx_id, final=True) for tx_id in overdue))
+
+    async def _resolve(self, tx_id: str, final: bool = False):
+        entry = self._pending.get(tx_id)
+        if entry is None:
+            return
+        try:
+            info = await self.algod_client.pending_transaction_info(tx_id)
+        except Exception as e:
+            if final:
+                self._fail(tx_id, Exception(f"Transaction {tx_id} not confirmed after timeout: {e}"))
+            return
+
+        if info.get("confirmed-round", 0) > 0:
+            if self._pending.pop(tx_id, None) is None:
+                return
+            self.stats["confirmed"] += 1
+            if not entry["future"].done():
+                entry["future"].set_result(info)
+            for callback in self._listeners:
+                try:
+                    await callback(tx_id, info)
+                except Exception as e:
+                    logger.error(f"Confirmation listener error: {e}")
+        elif info.get("pool-error"):
+            self._fail(tx_id, Exception(f"Transaction rejected: {info['pool-error']}"))
+        elif final:
+            self._fail(tx_id, Exception(f"Transaction {tx_id} not confirmed after timeout"))
+
+    def _fail(self, tx_id: str, error: Exception):
+        entry = self._pending.pop(tx_id, None)
+        if entry is None:
+            return
+        self.stats["failed"] += 1
+        if not entry["future"].done():
+            entry["future"].set_exception(error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending), "last_round": self.last_round}
+
+    async def close(self):
+        """Stop the watcher and fail whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for lookup in list(self._lookups):
+            lookup.cancel()
+        for tx_id in list(self._pending):
+            self._fail(tx_id, Exception("Confirmation tracker closed"))
+
+
+# One watcher per node address, shared by every AlgorandService in the process
+_trackers: Dict[str, ConfirmationTracker] = {}
+
+
+def get_confirmation_tracker(address: str, token: str = "") -> ConfirmationTracker:
+    if address not in _trackers:
+        _trackers[address] = ConfirmationTracker(get_algod_client(address, token))
+    return _trackers[address]
+
+
+async def close_trackers():
+    """Stop every watcher (on shutdown)"""
+    for tracker in _trackers.values():
+        await tracker.close()
+    _trackers.clear()
@@ -0,0 +1,123 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from algosdk import transaction
+from algosdk.constants import MIN_TXN_FEE
+
+from src.services.algod_client import AsyncAlgodClient, get_algod_client
+
+logger = logging.getLogger(__name__)
+
+# Size used to turn a per-byte fee into a flat fee (a signed app call with a
+# few arguments)
+TYPICAL_TXN_SIZE = 300
+
+
+class ParamsCache:
+    """
+    Suggested params for the current round, refreshed in the background
+
+    Params only change when a round is added, so one background task
+    follows rounds and refetches them; submissions read the cached copy
+    without a node round-trip. If the refresher falls behind (node down)
+    the params are refetched inline once they are older than `max_age`
+    seconds.
+
+    A non-zero per-byte fee means the node's transaction pool is
+    congested. The cached params then carry a flat fee of the per-byte fee
+    for a typical transaction (at least the minimum fee) times
+    `congestion_multiplier`, capped at `max_fee`, so submissions are not
+    priced out while the pool drains.
+    """
+
+    def __init__(
+        self,
+        algod_client: AsyncAlgodClient,
+        congestion_multiplier: float = 2.0,
+        max_fee: int = 20000,
+        max_age: float = 30.0
+    ):
+        self.algod_client = algod_client
+        self.congestion_multiplier = congestion_multiplier
+        self.max_fee = max_fee
+        self.max_age = max_age
+        self.round = 0
+        self.congested = False
+        self._params: Optional[transaction.SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "fetches": 0}
+
+    async def get(self) -> transaction.SuggestedParams:
+        """Suggested params for the latest round seen"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        if self._params is None or time.monotonic() - self._fetched_at > self.max_age:
+            async with self._lock:
+                if self._params is None or time.monotonic() - self._fetched_at > self.max_age:
+                    await self._refresh()
+        else:
+            self.stats["hits"] += 1
+        return self._params
+
+    async def _refresh(self):
+        params = await self.algod_client.suggested_params()
+        self.stats["fetches"] += 1
+        self.congested = params.fee > 0
+        if self.congested:
+            fee = max(params.fee * TYPICAL_TXN_SIZE, params.min_fee or MIN_TXN_FEE)
+            params = copy.copy(params)
+            params.fee = min(int(fee * self.congestion_multiplier), self.max_fee)
+            params.flat_fee = True
+            logger.info(f"Node congested at round {params.first}, paying flat fee {params.fee}")
+        self._params = params
+        self._fetched_at = time.monotonic()
+        self.round = params.first
+
+    async def _run(self):
+        while True:
+            try:
+                # Returns as soon as the node is past the cached round
+                status = await self.algod_client.status_after_block(self.round)
+                if status["last-round"] > self.round:
+                    async with self._lock:
+                        await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Suggested params refresh failed: {e}")
+                await asyncio.sleep(1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "round": self.round, "congested": self.congested}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# One cache per node address, shared by every AlgorandService in the process
+_caches: Dict[str, ParamsCache] = {}
+
+
+def get_params_cache(address: str, token: str = "", **options) -> ParamsCache:
+    if address not in _caches:
+        _caches[address] = ParamsCache(get_algod_client(address, token), **options)
+    return _caches[address]
+
+
+async def close_params_caches():
+    """Stop every refresher (on shutdown)"""
+    for cache in _caches.values():
+        await cache.close()
+    _caches.clear()
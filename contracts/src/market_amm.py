@@ -0,0 +1,208 @@
+"""
+Prediction Market AMMs
+Pricing engines shared by the API and the mock blockchain
+"""
+
+import math
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class AMM:
+    """
+    Base class for prediction market pricing engines
+
+    A market's state is the pair (yes, no) stored in its total_yes_stake and
+    total_no_stake fields; what the pair means depends on the engine.
+    Engines are stateless apart from their parameters, so one instance can
+    price any number of markets.
+    """
+
+    name = ""
+
+    def initial_state(self, liquidity: float) -> Tuple[float, float]:
+        """State of a new market funded with `liquidity`"""
+        raise NotImplementedError
+
+    def prices(self, yes: float, no: float) -> Tuple[float, float]:
+        """Current (yes_price, no_price) of a market state"""
+        raise NotImplementedError
+
+    def marginal_price(self, yes: float, no: float, position: str) -> float:
+        """Cost of one more share of `position` at zero size, d(amount)/d(shares)"""
+        raise NotImplementedError
+
+    def quote_many(self, yes: float, no: float, position: str, amounts: Any) -> Dict[str, np.ndarray]:
+        """
+        Price a ladder of order sizes against one market state
+        Every entry is independent (each order starts from the same state).
+        Returns arrays of: shares, avg_price, price_impact (relative to the
+        marginal price), and the resulting yes/no state and prices.
+        """
+        raise NotImplementedError
+
+    def quote(self, yes: float, no: float, position: str, amount: float) -> Dict[str, float]:
+        """Price a single order"""
+        quotes = self.quote_many(yes, no, position, [amount])
+        return {field: float(values[0]) for field, values in quotes.items()}
+
+    def trade(self, yes: float, no: float, position: str, amount: float) -> Tuple[float, float, float]:
+        """Apply an order; returns (shares bought, new yes, new no)"""
+        quote = self.quote(yes, no, position, amount)
+        return quote["shares"], quote["yes"], quote["no"]
+
+    def redemption_value(self, shares: Any, amounts: Any) -> Any:
+        """
+        Reputation winning positions redeem for, given their shares and the
+        amounts paid for them (scalars or arrays); one per share by default
+        """
+        return shares
+
+    def params(self) -> Dict[str, Any]:
+        """Engine parameters stored with each market"""
+        return {"amm": self.name}
+
+
+class ConstantProductAMM(AMM):
+    """
+    Constant product market maker (x * y = k)
+
+    The state is the stake on each side. Buying a side adds the order to
+    its stake and takes shares out of the opposite stake so that the
+    product stays constant; prices are the stake ratios.
+    """
+
+    name = "constant_product"
+
+    def initial_state(self, liquidity: float) -> Tuple[float, float]:
+        return liquidity / 2, liquidity / 2
+
+    def prices(self, yes: float, no: float) -> Tuple[float, float]:
+        total = yes + no
+        if total == 0:
+            return 0.5, 0.5
+        return yes / total, no / total
+
+    def redemption_value(self, shares: Any, amounts: Any) -> Any:
+        # Shares are taken out of the opposite stake, so a winner gets its
+        # own stake back on top of them
+        return amounts + shares
+
+    def marginal_price(self, yes: float, no: float, position: str) -> float:
+        current, opposite = (yes, no) if position == "YES" else (no, yes)
+        if opposite == 0:
+            # Nothing left to buy
+            return math.inf
+        return current / opposite
+
+    def quote_many(self, yes: float, no: float, position: str, amounts: Any) -> Dict[str, np.ndarray]:
+        amounts = np.asarray(amounts, dtype=np.float64)
+        current, opposite = (yes, no) if position == "YES" else (no, yes)
+
+        new_current = current + amounts
+        new_opposite = current * opposite / new_current
+        shares = opposite - new_opposite
+        avg_price = np.divide(amounts, shares, out=np.zeros_like(amounts), where=shares > 0)
+        marginal = self.marginal_price(yes, no, position)
+        if 0 < marginal < math.inf:
+            price_impact = np.where(shares > 0, avg_price / marginal - 1, 0.0)
+        else:
+            # A side without liquidity has no marginal price to compare against
+            price_impact = np.zeros_like(amounts)
+
+        new_yes, new_no = (new_current, new_opposite) if position == "YES" else (new_opposite, new_current)
+        total = new_yes + new_no
+        return {
+            "amounts": amounts,
+            "shares": shares,
+            "avg_price": avg_price,
+            "price_impact": price_impact,
+            "yes": new_yes,
+            "no": new_no,
+            "yes_price": new_yes / total,
+            "no_price": new_no / total
+        }
+
+
+class LMSRAMM(AMM):
+    """
+    Logarithmic market scoring rule (Hanson)
+
+    The state is the number of outstanding shares on each side. The cost
+    function C(q) = b * ln(e^(q_yes/b) + e^(q_no/b)) gives closed forms for
+    both prices (a softmax) and the shares an order buys. The liquidity
+    parameter b is chosen so the maker's worst-case loss equals the
+    market's initial liquidity.
+    """
+
+    name = "lmsr"
+
+    def __init__(self, liquidity: float = 100.0):
+        self.b = liquidity
+
+    @classmethod
+    def for_liquidity(cls, liquidity: float) -> "LMSRAMM":
+        """Engine whose worst-case loss is `liquidity`"""
+        return cls(liquidity / math.log(2))
+
+    def initial_state(self, liquidity: float) -> Tuple[float, float]:
+        return 0.0, 0.0
+
+    def prices(self, yes: float, no: float) -> Tuple[float, float]:
+        yes_price = 1.0 / (1.0 + math.exp((no - yes) / self.b))
+        return yes_price, 1.0 - yes_price
+
+    def marginal_price(self, yes: float, no: float, position: str) -> float:
+        current, opposite = (yes, no) if position == "YES" else (no, yes)
+        return 1.0 / (1.0 + math.exp((opposite - current) / self.b))
+
+    def quote_many(self, yes: float, no: float, position: str, amounts: Any) -> Dict[str, np.ndarray]:
+        amounts = np.asarray(amounts, dtype=np.float64)
+        b = self.b
+        current, opposite = (yes, no) if position == "YES" else (no, yes)
+
+        # Solve C(current + s, opposite) = C(current, opposite) + amount for s:
+        # s = b * ln(e^((C + amount)/b) - e^(opposite/b)) - current
+        x = np.logaddexp(current / b, opposite / b) + amounts / b
+        shares = b * (x + np.log1p(-np.exp(opposite / b - x))) - current
+        avg_price = np.divide(amounts, shares, out=np.zeros_like(amounts), where=shares > 0)
+        marginal = self.marginal_price(yes, no, position)
+
+        new_current = current + shares
+        new_opposite = np.full_like(amounts, opposite)
+        new_yes, new_no = (new_current, new_opposite) if position == "YES" else (new_opposite, new_current)
+        yes_price = 1.0 / (1.0 + np.exp((new_no - new_yes) / b))
+        return {
+            "amounts": amounts,
+            "shares": shares,
+            "avg_price": avg_price,
+            "price_impact": np.where(shares > 0, avg_price / marginal - 1, 0.0),
+            "yes": new_yes,
+            "no": new_no,
+            "yes_price": yes_price,
+            "no_price": 1.0 - yes_price
+        }
+
+    def params(self) -> Dict[str, Any]:
+        return {"amm": self.name, "amm_liquidity": self.b}
+
+
+DEFAULT_AMM = "constant_product"
+
+
+def create_amm(kind: str = DEFAULT_AMM, liquidity: Optional[float] = None) -> AMM:
+    """Create a pricing engine by name, sized for a market's initial liquidity"""
+    if kind == "constant_product":
+        return ConstantProductAMM()
+    if kind == "lmsr":
+        return LMSRAMM.for_liquidity(liquidity) if liquidity else LMSRAMM()
+    raise ValueError(f"Unknown AMM: {kind}")
+
+
+def amm_for_market(market: Dict[str, Any]) -> AMM:
+    """The engine a market was created with"""
+    kind = market.get("amm", DEFAULT_AMM)
+    if kind == "lmsr":
+        return LMSRAMM(market["amm_liquidity"])
+    return create_amm(kind)
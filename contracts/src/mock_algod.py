@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Mock Algod Emulator
+Serves the algod REST endpoints used by AlgorandService on top of MockBlockchain
+"""
+
+import sys
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import msgpack
+from algosdk import encoding
+
+from mock_blockchain import MockBlockchain
+
+logger = logging.getLogger(__name__)
+
+# Pending transaction results kept for pending_transaction_info lookups
+MAX_PENDING_RESULTS = 10000
+
+# Rounds whose transaction ids are kept for block txid lookups
+MAX_BLOCK_TXIDS = 10000
+
+
+def itob(value: int) -> bytes:
+    """Encode an integer the way the contracts' op.itob does"""
+    return value.to_bytes(8, 'big')
+
+
+class AlgodError(Exception):
+    """Error reported to the client with an algod-style status and message"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AlgodEmulator:
+    """
+    Translates algod requests into MockBlockchain calls
+
+    Signed application calls are decoded from msgpack, mapped to chain
+    methods by app id and first app argument, and confirmed synchronously.
+    Their results are kept with contract-style logs so that
+    pending_transaction_info returns what a real node would. Several
+    transactions sent together are applied as one atomic group.
+    Signatures are not verified.
+    """
+
+    def __init__(
+        self,
+        chain: MockBlockchain,
+        claim_registry_app_id: int = 1001,
+        reputation_token_app_id: int = 1002,
+        validation_pool_app_id: int = 1003,
+        genesis_id: str = "defacto-mock-v1"
+    ):
+        self.chain = chain
+        self.claim_registry_app_id = claim_registry_app_id
+        self.reputation_token_app_id = reputation_token_app_id
+        self.validation_pool_app_id = validation_pool_app_id
+        self.genesis_id = genesis_id
+        self.genesis_hash = base64.b64encode(hashlib.sha256(genesis_id.encode()).digest()).decode()
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._block_txids: "OrderedDict[int, List[str]]" = OrderedDict()
+        # Both are shared by the server's handler threads
+        self._results_lock = threading.Lock()
+
+    # Node status
+
+    def status(self) -> Dict[str, Any]:
+        chain_status = self.chain.get_status()
+        return {
+            "last-round": chain_status["block_height"],
+            "last-version": "future",
+            "next-version": "future",
+            "next-version-round": chain_status["block_height"] + 1,
+            "next-version-supported": True,
+            "time-since-last-round": max(0, int(time.time()) - chain_status["timestamp"]) * 10**9,
+            "catchup-time": 0,
+            "stopped-at-unsupported-round": False
+        }
+
+    def wait_for_block_after(self, round_number: int, timeout: float = 5.0) -> Dict[str, Any]:
+        """Return once the chain is past `round_number`, or after `timeout` like algod"""
+        deadline = time.monotonic() + timeout
+        while self.chain.get_status()["block_height"] <= round_number and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self.status()
+
+    def suggested_params(self) -> Dict[str, Any]:
+        return {
+            "consensus-version": "future",
+            "fee": 0,
+            "genesis-hash": self.genesis_hash,
+            "genesis-id": self.genesis_id,
+            "last-round": self.chain.get_status()["block_height"],
+            "min-fee": 1000
+        }
+
+    # Transactions
+
+    def _to_chain_call(self, txn) -> Tuple[Dict[str, Any], str]:
+        """Map an application call to a chain group transaction and its event name"""
+        app_args = txn.app_args or []
+        method = app_args[0] if app_args else b""
+        # The chain derives tx ids and rejects replays from the validity window and note
+        window = {"first_valid": txn.first_valid_round, "last_valid": txn.last_valid_round}
+        if txn.lease:
+            window["lease"] = base64.b64encode(txn.lease).decode()
+        if txn.note:
+            window["note"] = base64.b64encode(txn.note).decode()
+
+        if txn.index == self.claim_registry_app_id and method == b"submit_claim":
+            return {
+                "type": "submit_claim",
+                "ipfs_hash": app_args[1].decode(),
+                "category": app_args[2].decode(),
+                **window
+            }, "ClaimSubmitted"
+        if txn.index == self.validation_pool_app_id and method == b"cast_vote":
+            return {
+                "type": "submit_vote",
+                "claim_id": int.from_bytes(app_args[1], 'big'),
+                "voter": txn.sender,
+                "vote": bool(int.from_bytes(app_args[2], 'big')),
+                "stake": int.from_bytes(app_args[3], 'big'),
+                **window
+            }, "VoteCast"
+        if txn.index == self.reputation_token_app_id and method == b"opt_in":
+            return {"type": "opt_in_user", "address": txn.sender, **window}, "ValidatorOptedIn"
+
+        raise AlgodError(400, f"unsupported application call {method!r} to app {txn.index}")
+
+    def _address_bytes(self, address: str) -> bytes:
+        try:
+            return encoding.decode_address(address)
+        except Exception:
+            return address.encode()
+
+    def _logs(self, event: str, call: Dict[str, Any], result: Dict[str, Any]) -> List[str]:
+        """Contract-style logs: the event name followed by its fields"""
+        if event == "ClaimSubmitted":
+            fields = [itob(result["claim_id"])]
+        elif event == "VoteCast":
+            fields = [
+                itob(call["claim_id"]),
+                self._address_bytes(call["voter"]),
+                itob(int(call["vote"])),
+                itob(call["stake"])
+            ]
+        else:
+            fields = [self._address_bytes(call["address"])]
+        return [base64.b64encode(log).decode() for log in [event.encode()] + fields]
+
+    def send_raw_transactions(self, body: bytes) -> str:
+        """Decode, apply and confirm the signed transactions in a request body"""
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(body)
+        signed = [encoding.msgpack_decode(obj) for obj in unpacker]
+        if not signed:
+            raise AlgodError(400, "no transactions in request body")
+
+        txns = [stxn.transaction for stxn in signed]
+        calls = [self._to_chain_call(txn) for txn in txns]
+
+        try:
+            if len(calls) == 1:
+                call, _ = calls[0]
+                params = {key: value for key, value in call.items() if key != "type"}
+                results = [getattr(self.chain, call["type"])(**params)]
+                confirmed_round = None
+            else:
+                group = self.chain.submit_group([call for call, _ in calls])
+                results = group["results"]
+                confirmed_round = group["confirmed_round"]
+        except AlgodError:
+            raise
+        except Exception as e:
+            raise AlgodError(400, f"TransactionPool.Remember: {e}")
+
+        for txn, (call, event), result in zip(txns, calls, results):
+            # Each call reports the round it was (or will be) confirmed in;
+            # reading the chain's height afterwards could name a round that
+            # was already confirmed, or another request's
+            tx_round = result.get("confirmed_round") or confirmed_round
+            info = {
+                "confirmed-round": tx_round,
+                "pool-error": "",
+                "logs": self._logs(event, call, result),
+                "txn": {"txn": {"type": "appl", "apid": txn.index, "snd": txn.sender}}
+            }
+            with self._results_lock:
+                self._results[txn.get_txid()] = info
+                self._block_txids.setdefault(tx_round, []).append(txn.get_txid())
+                while len(self._results) > MAX_PENDING_RESULTS:
+                    self._results.popitem(last=False)
+                while len(self._block_txids) > MAX_BLOCK_TXIDS:
+                    self._block_txids.popitem(last=False)
+
+        return txns[0].get_txid()
+
+    def pending_transaction_info(self, tx_id: str) -> Dict[str, Any]:
+        with self._results_lock:
+            result = self._results.get(tx_id)
+        if result is None:
+            raise AlgodError(404, "txn not found")
+        return result
+
+    def block_txids(self, round_number: int) -> Dict[str, Any]:
+        """Ids of the transactions confirmed in a round"""
+        if round_number > self.chain.get_status()["block_height"]:
+            raise AlgodError(404, f"ledger does not have entry {round_number}")
+        with self._results_lock:
+            return {"blockTxids": list(self._block_txids.get(round_number, []))}
+
+    # Applications
+
+    def application_box_by_name(self, app_id: int, name: bytes) -> Dict[str, Any]:
+        value = self._box_value(app_id, name)
+        if value is None:
+            raise AlgodError(404, "box not found")
+        return {
+            "name": base64.b64encode(name).decode(),
+            "round": self.chain.get_status()["block_height"],
+            "value": base64.b64encode(value).decode()
+        }
+
+    def _box_value(self, app_id: int, name: bytes) -> Optional[bytes]:
+        if app_id == self.claim_registry_app_id and name.startswith(b"claim_"):
+            # The contract's key: "claim_" + itob(claim_id)
+            suffix = name[len(b"claim_"):]
+            if len(suffix) != 8:
+                return None
+            claim = self.chain.get_claim(int.from_bytes(suffix, 'big'))
+            if claim is None:
+                return None
+            return f"{claim['ipfs_hash']}|{claim['category']}|{claim['status']}".encode()
+
+        if app_id == self.reputation_token_app_id and name.startswith(b"rep_"):
+            user = self.chain.view.get("users", name[len(b"rep_"):].decode())
+            if user is None:
+                return None
+            return itob(user["reputation"])
+
+        return None
+
+    def application_info(self, app_id: int) -> Dict[str, Any]:
+        if app_id not in (self.claim_registry_app_id, self.reputation_token_app_id, self.validation_pool_app_id):
+            raise AlgodError(404, "application does not exist")
+
+        global_state = []
+        if app_id == self.claim_registry_app_id:
+            global_state.append({
+                "key": base64.b64encode(b"claim_counter").decode(),
+                "value": {"type": 2, "bytes": "", "uint": self.chain.get_status()["total_claims"]}
+            })
+        return {"id": app_id, "params": {"creator": "", "global-state": global_state}}
+
+
+class AlgodRequestHandler(BaseHTTPRequestHandler):
+    """Routes algod v2 REST paths to the emulator"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, handler):
+        try:
+            self._send_json(200, handler())
+        except AlgodError as e:
+            self._send_json(e.status, {"message": str(e)})
+        except Exception as e:
+            logger.error(f"Algod emulator error: {e}")
+            self._send_json(500, {"message": str(e)})
+
+    def do_GET(self):
+        emulator: AlgodEmulator = self.server.emulator
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+
+        if parts == ["health"]:
+            self._dispatch(lambda: {})
+        elif parts == ["v2", "status"]:
+            self._dispatch(emulator.status)
+        elif parts[:3] == ["v2", "status", "wait-for-block-after"] and len(parts) == 4:
+            self._dispatch(lambda: emulator.wait_for_block_after(int(parts[3])))
+        elif parts == ["v2", "transactions", "params"]:
+            self._dispatch(emulator.suggested_params)
+        elif parts[:2] == ["v2", "blocks"] and len(parts) == 4 and parts[3] == "txids":
+            self._dispatch(lambda: emulator.block_txids(int(parts[2])))
+        elif parts[:3] == ["v2", "transactions", "pending"] and len(parts) == 4:
+            self._dispatch(lambda: emulator.pending_transaction_info(parts[3]))
+        elif parts[:2] == ["v2", "applications"] and len(parts) == 4 and parts[3] == "box":
+            name = query.get("name", [""])[0]
+            encoding_prefix, _, value = name.partition(":")
+            box_name = base64.b64decode(value) if encoding_prefix == "b64" else name.encode()
+            self._dispatch(lambda: emulator.application_box_by_name(int(parts[2]), box_name))
+        elif parts[:2] == ["v2", "applications"] and len(parts) == 3:
+            self._dispatch(lambda: emulator.application_info(int(parts[2])))
+        else:
+            self._send_json(404, {"message": f"unknown path {url.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if urlparse(self.path).path.rstrip("/") == "/v2/transactions":
+            self._dispatch(lambda: {"txId": self.server.emulator.send_raw_transactions(body)})
+        else:
+            self._send_json(404, {"message": f"unknown path {self.path}"})
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class AlgodHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server for the algod emulator"""
+
+    daemon_threads = True
+
+    def __init__(self, address, emulator: AlgodEmulator):
+        self.emulator = emulator
+        super().__init__(address, AlgodRequestHandler)
+
+
+def main():
+    """Run the algod emulator"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Emulate algod on top of the mock blockchain")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=4001, help="Port to listen on (algod default 4001)")
+    parser.add_argument("--data-dir", default="./blockchain_data", help="Chain data directory")
+    parser.add_argument("--storage", choices=["wal", "json", "sqlite"], default="wal", help="Storage engine")
+    parser.add_argument("--block-interval", type=float, default=None, help="Seconds per block round")
+    parser.add_argument("--claim-registry-app-id", type=int, default=1001)
+    parser.add_argument("--reputation-token-app-id", type=int, default=1002)
+    parser.add_argument("--validation-pool-app-id", type=int, default=1003)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    chain = MockBlockchain(args.data_dir, storage=args.storage, block_interval=args.block_interval, auto_settle=True)
+    emulator = AlgodEmulator(
+        chain,
+        claim_registry_app_id=args.claim_registry_app_id,
+        reputation_token_app_id=args.reputation_token_app_id,
+        validation_pool_app_id=args.validation_pool_app_id
+    )
+    server = AlgodHTTPServer((args.host, args.port), emulator)
+    logger.info(f"Algod emulator serving {args.data_dir} on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        chain.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
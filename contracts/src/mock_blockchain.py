@@ -3,72 +3,647 @@ Mock Blockchain Implementation
 Simulates Algorand blockchain behavior for local development
 """
 
+import os
 import json
 import time
+import heapq
+import base64
 import hashlib
-from typing import Dict, Any, Optional, List
+import inspect
+import functools
+from typing import Dict, Any, Optional, List, Tuple, Union
 from pathlib import Path
 import threading
-import random
+import logging
+from collections import OrderedDict
+
+import numpy as np
+from operator import itemgetter
+from contextlib import contextmanager
+
+from mock_storage import StorageEngine, GroupCommitter, CommitTicket, create_storage
+from mock_state import VersionedState, freeze
+from market_amm import DEFAULT_AMM, create_amm, amm_for_market
+from mock_merkle import EMPTY, SparseMerkleTree, ref_hash, verify_proof as verify_merkle_proof
+from mock_events import EventLog
+
+logger = logging.getLogger(__name__)
+
+# Algorand caps atomic transaction groups at 16 transactions
+MAX_GROUP_SIZE = 16
+
+# Methods that may appear in an atomic group, keyed by transaction type
+GROUP_METHODS = {
+    "submit_claim",
+    "update_claim_status",
+    "opt_in_user",
+    "submit_vote",
+    "create_market",
+    "place_bet",
+    "resolve_market"
+}
+
+# Before-image of a record that did not exist yet
+_MISSING = object()
+
+# State field holding the Merkle root of everything else
+STATE_ROOT_KEY = ("state", "state_root")
+
+# Algorand rejects validity windows longer than 1000 rounds
+MAX_TXN_LIFE = 1000
+
+# Share of the staked reputation one side needs to settle a claim
+# (the ValidationPool contract's default consensus threshold)
+CONSENSUS_THRESHOLD = 0.6
+
+# Claim verdicts that decide a market's outcome
+MARKET_OUTCOMES = {"VERIFIED": True, "FALSE": False}
+
+# Reputation a user record starts with
+INITIAL_REPUTATION = 100
+
+
+def _canonical(value: Any) -> bytes:
+    """Canonical encoding of a transaction payload (sorted keys, no whitespace)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def ledger_transaction(method):
+    """
+    Make a write method an Algorand-style transaction
+
+    The wrapped method accepts optional `first_valid`, `last_valid`, `lease`
+    and `note` keyword arguments. Its tx id is derived from the method, its
+    arguments, the validity window and the note, so resubmitting the same
+    transaction within its window is rejected instead of applied twice;
+    callers that mean to repeat an identical call give each a distinct note.
+    Calls that change nothing (e.g. opting in a user who already is) are
+    not recorded, so they stay idempotent.
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, first_valid: Optional[int] = None, last_valid: Optional[int] = None,
+                lease: Optional[str] = None, note: Optional[str] = None, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(list(bound.arguments.items())[1:])
+        
+        with self._transaction():
+            txn = self._check_txn(method.__name__, arguments, first_valid, last_valid, lease, note)
+            outer_tx_id = self._tx_id
+            self._tx_id = txn["tx_id"]
+            writes = self._writes
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self._tx_id = outer_tx_id
+            if result is not False and self._writes != writes:
+                self._remember_txn(txn)
+            return result
+    
+    return wrapper
 
 class MockBlockchain:
     """Mock blockchain that simulates Algorand behavior"""
     
-    def __init__(self, data_dir: str = "./blockchain_data"):
+    def __init__(
+        self,
+        data_dir: str = "./blockchain_data",
+        storage: Union[str, StorageEngine] = "wal",
+        group_commit: bool = False,
+        commit_batch_size: int = 64,
+        commit_max_delay: float = 0.001,
+        history_blocks: int = 128,
+        block_interval: Optional[float] = None,
+        block_max_txns: int = 1000,
+        batch_auctions: bool = False,
+        auto_settle: bool = False,
+        settle_batch_size: int = 256,
+        event_buffer: int = 10000,
+        **storage_options
+    ):
+        if batch_auctions and block_interval is None:
+            raise ValueError("Batch auctions need round-based block production (block_interval)")
+        
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
         
-        # Initialize storage files
-        self.claims_file = self.data_dir / "claims.json"
-        self.votes_file = self.data_dir / "votes.json"
-        self.markets_file = self.data_dir / "markets.json"
-        self.users_file = self.data_dir / "users.json"
-        self.state_file = self.data_dir / "state.json"
+        # Initialize storage engine
+        if isinstance(storage, StorageEngine):
+            self.storage = storage
+        else:
+            if group_commit and storage == "wal":
+                # Batches are only worth acknowledging once they hit the disk
+                storage_options.setdefault("fsync", True)
+            self.storage = create_storage(storage, self.data_dir, **storage_options)
         
         # Load or initialize data
-        self.claims = self._load_json(self.claims_file, {})
-        self.votes = self._load_json(self.votes_file, {})
-        self.markets = self._load_json(self.markets_file, {})
-        self.users = self._load_json(self.users_file, {})
-        self.state = self._load_json(self.state_file, {
+        collections = self.storage.load()
+        self.claims = collections["claims"]
+        self.votes = collections["votes"]
+        self.markets = collections["markets"]
+        self.users = collections["users"]
+        self.state = collections["state"]
+        # Fields are persisted individually, so fill in any never written yet
+        defaults = {
             "claim_counter": 0,
             "market_counter": 0,
             "block_height": 1,
             "timestamp": int(time.time())
-        })
+        }
+        if "user_count" not in self.state:
+            defaults["user_count"] = len(self.users)
+        unwritten = [key for key in defaults if key not in self.state]
+        for key in unwritten:
+            self.state[key] = defaults[key]
+        
+        # Atomic group being applied, if any (see submit_group)
+        self._group: Optional[Dict[str, Any]] = None
+        
+        # Replay protection: confirmed tx ids and active leases, each mapped
+        # to its last valid round, expired through a heap ordered by that round
+        self._tx_id: Optional[str] = None
+        self._writes = 0
+        self._seen_txns: Dict[str, int] = {}
+        self._leases: Dict[str, int] = {}
+        self._txn_expiry: List[Tuple[int, str, str]] = []
+        
+        # Events of the transaction(s) being applied, published with the
+        # transition that commits them
+        self.events = EventLog(event_buffer)
+        self._staged_events: List[Tuple[str, Dict[str, Any]]] = []
+        
+        # Secondary indexes, derived from the collections on load
+        self._rebuild_indexes()
+        
+        # Versioned snapshots served to lock-free readers
+        if self.storage.lazy:
+            # Only the state is held in memory; records are read on demand
+            seed = {name: {} for name in self._collections()}
+            seed["state"] = self.state
+            self.view = VersionedState(seed, self.state["block_height"], history_blocks, base=self.storage)
+        else:
+            self.view = VersionedState(self._collections(), self.state["block_height"], history_blocks)
+        
+        # Sparse Merkle commitment over every record, plus the roots of
+        # recent blocks so proofs can be served against them
+        self.history_blocks = history_blocks
+        if self.storage.lazy:
+            self.merkle = self._load_merkle(unwritten)
+        else:
+            self.merkle = SparseMerkleTree.from_records(self._scan_records())
+            stored_root = self.state.get("state_root")
+            # Fields filled in above were not part of the stored root
+            if stored_root is not None and not unwritten and stored_root != self.merkle.root_hash:
+                logger.warning(f"State root mismatch on load: stored {stored_root}, rebuilt {self.merkle.root_hash}")
+        self._state_roots: "OrderedDict[int, Any]" = OrderedDict()
+        self._state_roots[self.state["block_height"]] = self.merkle.root
         
         # Lock for thread safety
         self.lock = threading.Lock()
+        self._lock_owner: Optional[int] = None
+        
+        # Optional group commit: writers are released once their batch is durable
+        self.committer = None
+        if group_commit:
+            self.committer = GroupCommitter(self.storage, commit_batch_size, commit_max_delay)
+        self._tickets: Optional[List[CommitTicket]] = None
+        
+        # Optional frequent batch auctions: bets are pooled per market and
+        # cleared at one price when their block is sealed
+        self.batch_auctions = batch_auctions
+        self._auction_orders: Dict[str, List[Tuple[str, str, float, Dict[str, Any]]]] = {}
+        
+        # Optional round-based block production: transactions are pooled and
+        # sealed into one block every block_interval seconds
+        self.producer = None
+        self._pending_keys: Dict[Tuple[str, str], None] = {}
+        self._pending_txns = 0
+        self._block_ticket = CommitTicket()
+        if block_interval is not None:
+            self.producer = BlockProducer(self, block_interval, block_max_txns)
+        
+        # Optional settlement of claims and markets once their deadline passes;
+        # off by default so that test chains start no thread
+        self.scheduler = None
+        if auto_settle:
+            self.scheduler = ExpiryScheduler(self, self._open_deadlines(), settle_batch_size)
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock, then wait for group-committed records outside it"""
+        if self._lock_owner == threading.get_ident():
+            # Nested in a transaction or atomic group that already holds the lock
+            yield
+            return
+        
+        tickets = []
+        with self.lock:
+            self._lock_owner = threading.get_ident()
+            self._tickets = tickets
+            try:
+                yield
+            finally:
+                self._tickets = None
+                self._lock_owner = None
+        
+        for ticket in tickets:
+            ticket.wait()
+    
+    def _rebuild_indexes(self):
+        """Rebuild claim/voter indexes from the loaded collections"""
+        self.market_by_claim: Dict[int, int] = {}
+        self.votes_by_claim: Dict[int, List[str]] = {}
+        self.claims_by_voter: Dict[str, List[int]] = {}
+        
+        if self.storage.lazy:
+            # The storage engine indexes persisted records; these dicts only
+            # cover records not yet written to it
+            return
+        
+        for market in self.markets.values():
+            self._index_market(market)
+        for vote_key, vote in self.votes.items():
+            self._index_vote(vote_key, vote)
+    
+    def _index_market(self, market: Dict[str, Any]):
+        """Add a market to the claim index"""
+        claim_id = int(market["claim_id"])
+        self.market_by_claim[claim_id] = market["market_id"]
+        if self._group is not None:
+            self._group["undo"].append(lambda: self.market_by_claim.pop(claim_id, None))
+    
+    def _index_vote(self, vote_key: str, vote: Dict[str, Any]):
+        """Add a vote to the claim and voter indexes"""
+        claim_id = int(vote["claim_id"])
+        voter = vote["voter"]
+        self.votes_by_claim.setdefault(claim_id, []).append(vote_key)
+        self.claims_by_voter.setdefault(voter, []).append(claim_id)
+        if self._group is not None:
+            def undo():
+                self.votes_by_claim[claim_id].remove(vote_key)
+                self.claims_by_voter[voter].remove(claim_id)
+            self._group["undo"].append(undo)
+    
+    def _market_for_claim(self, claim_id: int) -> Optional[int]:
+        """Look up the market created for a claim"""
+        market_id = self.market_by_claim.get(int(claim_id))
+        if market_id is None and self.storage.lazy:
+            market_id = self.storage.market_for_claim(int(claim_id))
+        return market_id
+    
+    def _vote_keys_for_claim(self, claim_id: int) -> List[str]:
+        """Look up the vote keys cast on a claim"""
+        vote_keys = list(self.votes_by_claim.get(int(claim_id), []))
+        if self.storage.lazy:
+            stored = self.storage.vote_keys_for_claim(int(claim_id))
+            vote_keys = stored + [key for key in vote_keys if key not in set(stored)]
+        return vote_keys
     
-    def _load_json(self, file_path: Path, default: Any) -> Any:
-        """Load JSON file or return default"""
-        if file_path.exists():
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        return default
+    def _claim_ids_for_voter(self, voter: str) -> List[int]:
+        """Look up the claims a voter has voted on"""
+        claim_ids = list(self.claims_by_voter.get(voter, []))
+        if self.storage.lazy:
+            stored = self.storage.claim_ids_for_voter(voter)
+            claim_ids = stored + [claim_id for claim_id in claim_ids if claim_id not in set(stored)]
+        return claim_ids
     
-    def _save_json(self, file_path: Path, data: Any):
-        """Save data to JSON file"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _collections(self) -> Dict[str, Dict[str, Any]]:
+        """All persisted collections by name"""
+        return {
+            "claims": self.claims,
+            "votes": self.votes,
+            "markets": self.markets,
+            "users": self.users,
+            "state": self.state
+        }
+    
+    def _persist(self, *keys: Tuple[str, str]):
+        """Persist the records touched by one state transition"""
+        self._writes += 1
+        if self._group is not None:
+            # Written once, together with the rest of the atomic group
+            self._group["keys"].update(dict.fromkeys(keys))
+        elif self.producer:
+            self._add_to_pending_block(keys)
+        else:
+            self._write_transition(keys)
+    
+    def _write_transition(self, keys: Tuple[Tuple[str, str], ...]):
+        """Write records to storage and publish them to readers"""
+        if self.state["block_height"] <= self.view.head:
+            # Published blocks never change: a transition that did not
+            # advance the height is given a block of its own
+            self.state["block_height"] = self.view.head + 1
+            self.state["timestamp"] = int(time.time())
+            keys = tuple(keys) + (("state", "block_height"), ("state", "timestamp"))
+        collections = self._collections()
+        keys, nodes = self._commit_state_root(keys)
+        changes = [(name, key, collections[name][key]) for name, key in keys]
+        record = self.storage.prepare(changes + [("merkle", "nodes", nodes)] if nodes else changes)
+        self.view.record(changes, self.state["block_height"])
+        
+        if self.committer:
+            self._tickets.append(self.committer.submit(record))
+        else:
+            self.storage.write([record])
+        
+        if self.storage.lazy:
+            # Written records are now covered by the storage engine's indexes
+            self.market_by_claim.clear()
+            self.votes_by_claim.clear()
+            self.claims_by_voter.clear()
+        
+        self.view.publish(self.state["block_height"])
+        self.events.publish(self._staged_events, self.state["block_height"])
+        self._staged_events = []
+        
+        if self.storage.needs_compaction():
+            if self.committer:
+                self.committer.compact(collections)
+            else:
+                self.storage.compact(collections)
+    
+    def _commit_state_root(self, keys: Tuple[Tuple[str, str], ...]) -> Tuple[tuple, List[Any]]:
+        """
+        Fold changed records into the Merkle tree and record the new root
+        Returns the keys to write (with the state root's) and, on a lazy
+        storage engine, the tree nodes to store with them.
+        """
+        collections = self._collections()
+        self.merkle.update_many(
+            (name, key, collections[name][key]) for name, key in keys if (name, key) != STATE_ROOT_KEY
+        )
+        self.state["state_root"] = self.merkle.root_hash
+        nodes = self.merkle.commit() if self.storage.lazy else []
+        
+        height = self.state["block_height"]
+        self._state_roots[height] = self.merkle.root
+        self._state_roots.move_to_end(height)
+        while next(iter(self._state_roots)) < height - self.history_blocks:
+            self._state_roots.popitem(last=False)
+        
+        if STATE_ROOT_KEY not in keys:
+            keys = tuple(keys) + (STATE_ROOT_KEY,)
+        return keys, nodes
+    
+    def _load_merkle(self, unwritten: List[str]) -> SparseMerkleTree:
+        """
+        Open the Merkle tree stored by a lazy storage engine at the stored root
+        State fields filled in with defaults on load (`unwritten`) are added
+        to it; they are stored with the next transition. Data written before
+        the tree was stored gets it built once, in batches, from a scan of
+        every record.
+        """
+        tree = SparseMerkleTree(store=self.storage)
+        stored_root = self.state.get("state_root")
+        if stored_root is not None and stored_root != EMPTY.hex():
+            root = bytes.fromhex(stored_root)
+            if self.storage.read_merkle_node(root) is not None:
+                tree.root = root
+                tree.update_many(("state", key, self.state[key]) for key in unwritten)
+                return tree
+        
+        logger.info("Building the state Merkle tree from stored records")
+        batch = []
+        for record in self._scan_records():
+            batch.append(record)
+            if len(batch) >= 10000:
+                tree.update_many(batch)
+                self.storage.write([self.storage.prepare([("merkle", "nodes", tree.commit())])])
+                batch = []
+        tree.update_many(batch)
+        self.storage.write([self.storage.prepare([("merkle", "nodes", tree.commit())])])
+        if stored_root is not None and not unwritten and stored_root != tree.root_hash:
+            logger.warning(f"State root mismatch on load: stored {stored_root}, rebuilt {tree.root_hash}")
+        return tree
+    
+    def _scan_records(self):
+        """Every record except the state root, for building the Merkle tree"""
+        for name, records in self._collections().items():
+            items = self.storage.scan(name) if self.storage.lazy and name != "state" else records.items()
+            for key, value in items:
+                if (name, key) != STATE_ROOT_KEY:
+                    yield name, key, value
+    
+    def _emit(self, event_type: str, **data):
+        """Stage an event for the transition being applied"""
+        if self._tx_id is not None:
+            data.setdefault("tx_id", self._tx_id)
+        self._staged_events.append((event_type, data))
+    
+    def _add_to_pending_block(self, keys: Tuple[Tuple[str, str], ...]):
+        """Pool a transaction's records until the block producer seals them"""
+        for key in keys:
+            self._pending_keys[key] = None
+        
+        if self._block_ticket not in self._tickets:
+            self._tickets.append(self._block_ticket)
+            self._pending_txns += 1
+            if self._pending_txns >= self.producer.max_txns:
+                self.producer.wake()
+    
+    def _seal_block(self) -> int:
+        """Seal pooled transactions into one block; returns the number sealed"""
+        block_ticket = None
+        try:
+            with self._transaction():
+                if not self._pending_txns:
+                    return 0
+                
+                if self._auction_orders:
+                    self._pending_keys.update(dict.fromkeys(self._clear_auctions()))
+                keys = tuple(self._pending_keys)
+                sealed = self._pending_txns
+                block_ticket = self._block_ticket
+                self._pending_keys = {}
+                self._pending_txns = 0
+                self._block_ticket = CommitTicket()
+                
+                self.state["block_height"] += 1
+                self.state["timestamp"] = int(time.time())
+                self._write_transition(keys + (("state", "block_height"), ("state", "timestamp")))
+        except Exception as e:
+            if block_ticket:
+                block_ticket.resolve(e)
+            raise
+        
+        # Release the pooled writers only once the block itself is durable
+        block_ticket.resolve()
+        return sealed
     
     def _generate_tx_id(self) -> str:
-        """Generate a transaction ID"""
-        data = f"{time.time()}{random.random()}"
-        return hashlib.sha256(data.encode()).hexdigest()[:52]
+        """ID of the transaction being applied"""
+        return self._tx_id
+    
+    def _check_txn(
+        self,
+        txn_type: str,
+        arguments: Dict[str, Any],
+        first_valid: Optional[int],
+        last_valid: Optional[int],
+        lease: Optional[str],
+        note: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Derive a transaction's id and reject it if it cannot be applied this round
+        Like Algorand, the id is the base32 SHA-512/256 of "TX" + the encoded
+        transaction, which here includes its validity window, lease and note.
+        """
+        current_round = self.state["block_height"] + 1
+        if first_valid is None:
+            first_valid = current_round
+        if last_valid is None:
+            last_valid = first_valid + MAX_TXN_LIFE
+        if last_valid - first_valid > MAX_TXN_LIFE:
+            raise Exception(f"Transaction validity window exceeds {MAX_TXN_LIFE} rounds")
+        if not first_valid <= current_round <= last_valid:
+            raise Exception(
+                f"Transaction is not valid in round {current_round} (valid {first_valid}-{last_valid})"
+            )
+        
+        payload = {"type": txn_type, "args": arguments, "fv": first_valid, "lv": last_valid}
+        if lease is not None:
+            payload["lx"] = lease
+        if note is not None:
+            payload["note"] = note
+        digest = hashlib.new("sha512_256", b"TX" + _canonical(payload)).digest()
+        tx_id = base64.b32encode(digest).decode().rstrip("=")
+        
+        self._expire_txns(current_round)
+        if tx_id in self._seen_txns:
+            raise Exception(f"Transaction {tx_id} already in ledger")
+        lease_key = f"{txn_type}:{lease}" if lease is not None else None
+        if lease_key in self._leases:
+            raise Exception(f"Transaction {tx_id} using an overlapping lease")
+        
+        return {"tx_id": tx_id, "last_valid": last_valid, "lease": lease_key}
+    
+    def _remember_txn(self, txn: Dict[str, Any]):
+        """Record an applied transaction (and its lease) until it expires"""
+        entries = [("txn", txn["tx_id"])]
+        if txn["lease"] is not None:
+            entries.append(("lease", txn["lease"]))
+        
+        for kind, key in entries:
+            self._txn_cache(kind)[key] = txn["last_valid"]
+            heapq.heappush(self._txn_expiry, (txn["last_valid"], kind, key))
+        
+        if self._group is not None:
+            def undo():
+                for kind, key in entries:
+                    self._txn_cache(kind).pop(key, None)
+            self._group["undo"].append(undo)
+    
+    def _expire_txns(self, current_round: int):
+        """Forget transactions and leases whose validity window has passed"""
+        while self._txn_expiry and self._txn_expiry[0][0] < current_round:
+            last_valid, kind, key = heapq.heappop(self._txn_expiry)
+            seen = self._txn_cache(kind)
+            if seen.get(key) == last_valid:
+                del seen[key]
     
-    def _increment_block(self):
-        """Increment block height and timestamp"""
+    def _txn_cache(self, kind: str) -> Dict[str, int]:
+        return self._leases if kind == "lease" else self._seen_txns
+    
+    def _increment_block(self, *keys: Tuple[str, str]) -> int:
+        """
+        Increment block height and timestamp, persisting them with the given records
+        Returns the round the transaction is confirmed in
+        """
+        if self.producer or self._group is not None:
+            # The block height advances when the pending block is sealed,
+            # or once for a whole atomic group
+            self._persist(*keys)
+            return self.state["block_height"] + 1
+        
         self.state["block_height"] += 1
         self.state["timestamp"] = int(time.time())
-        self._save_json(self.state_file, self.state)
+        self._persist(*keys, ("state", "block_height"), ("state", "timestamp"))
+        return self.state["block_height"]
+    
+    def _touch(self, *keys: Tuple[str, str]):
+        """Remember before-images of records an atomic group is about to change"""
+        if self._group is None:
+            return
+        
+        before = self._group["before"]
+        collections = self._collections()
+        for name, key in keys:
+            if (name, key) not in before:
+                value = collections[name].get(key, _MISSING)
+                before[(name, key)] = value if value is _MISSING else freeze(value)
+    
+    def _rollback_group(self, group: Dict[str, Any]):
+        """Restore every record and index entry a failed atomic group changed"""
+        for undo in reversed(group["undo"]):
+            undo()
+        del self._staged_events[group["events"]:]
+        
+        collections = self._collections()
+        for (name, key), value in group["before"].items():
+            if value is _MISSING:
+                collections[name].pop(key, None)
+            else:
+                collections[name][key] = value
+    
+    def submit_group(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply an atomic group of transactions all-or-nothing
+        Each transaction is a dict with a "type" (the method name) and its
+        arguments. The group is applied under one lock acquisition and
+        persisted as one block; if any transaction fails, none take effect.
+        """
+        if not transactions:
+            raise Exception("Transaction group is empty")
+        if len(transactions) > MAX_GROUP_SIZE:
+            raise Exception(f"Transaction group exceeds {MAX_GROUP_SIZE} transactions")
+        
+        with self._transaction():
+            group = {"keys": {}, "before": {}, "undo": [], "events": len(self._staged_events)}
+            self._group = group
+            results = []
+            try:
+                for index, txn in enumerate(transactions):
+                    params = dict(txn)
+                    txn_type = params.pop("type", None)
+                    if txn_type not in GROUP_METHODS:
+                        raise Exception(f"Unsupported transaction type in group: {txn_type}")
+                    try:
+                        result = getattr(self, txn_type)(**params)
+                    except Exception as e:
+                        raise Exception(f"Group transaction {index} ({txn_type}) failed: {e}")
+                    if result is False:
+                        raise Exception(f"Group transaction {index} ({txn_type}) was rejected")
+                    results.append(result)
+            except Exception:
+                self._rollback_group(group)
+                raise
+            finally:
+                self._group = None
+            
+            confirmed_round = self._increment_block(*group["keys"])
+            
+            # Algorand derives the group id from the hashes of its members
+            tx_ids = [result["tx_id"] for result in results if isinstance(result, dict) and "tx_id" in result]
+            group_id = base64.b64encode(
+                hashlib.sha256(b"TG" + "".join(tx_ids).encode()).digest()
+            ).decode()
+            
+            return {
+                "group_id": group_id,
+                "confirmed_round": confirmed_round,
+                "results": results
+            }
     
     # Claim Registry Methods
     
+    @ledger_transaction
     def submit_claim(self, ipfs_hash: str, category: str) -> Dict[str, Any]:
         """Submit a new claim"""
-        with self.lock:
+        with self._transaction():
             # Increment counter
+            self._touch(("state", "claim_counter"), ("claims", str(self.state["claim_counter"] + 1)))
             self.state["claim_counter"] += 1
             claim_id = self.state["claim_counter"]
             
@@ -88,68 +663,118 @@ class MockBlockchain:
             
             # Store claim
             self.claims[str(claim_id)] = claim
-            self._save_json(self.claims_file, self.claims)
+            if self.scheduler:
+                self.scheduler.schedule(claim["voting_ends_at"], "claim", claim_id)
+            
+            self._emit("ClaimSubmitted", claim_id=claim_id, ipfs_hash=ipfs_hash, category=category)
             
             # Increment block
-            self._increment_block()
+            confirmed_round = self._increment_block(("claims", str(claim_id)), ("state", "claim_counter"))
             
             return {
                 "claim_id": claim_id,
                 "tx_id": self._generate_tx_id(),
-                "confirmed_round": self.state["block_height"]
+                "confirmed_round": confirmed_round
             }
     
     def get_claim(self, claim_id: int) -> Optional[Dict[str, Any]]:
         """Get a claim by ID"""
-        return self.claims.get(str(claim_id))
+        return self.view.get("claims", str(claim_id))
     
+    @ledger_transaction
     def update_claim_status(self, claim_id: int, new_status: str) -> bool:
         """Update claim status"""
-        with self.lock:
+        with self._transaction():
             if str(claim_id) in self.claims:
+                self._touch(("claims", str(claim_id)))
                 self.claims[str(claim_id)]["status"] = new_status
-                self._save_json(self.claims_file, self.claims)
-                self._increment_block()
+                self._emit("ClaimStatusUpdated", claim_id=claim_id, status=new_status)
+                self._increment_block(("claims", str(claim_id)))
                 return True
             return False
     
     # Reputation System Methods
     
+    @ledger_transaction
     def opt_in_user(self, address: str) -> Dict[str, Any]:
         """Opt in user to reputation system"""
-        with self.lock:
-            if address not in self.users:
-                self.users[address] = {
-                    "address": address,
-                    "reputation": 100,  # Initial reputation
-                    "created_at": int(time.time()),
-                    "votes": []
-                }
-                self._save_json(self.users_file, self.users)
+        with self._transaction():
+            created = self._ensure_user(address)
+            if created:
+                confirmed_round = self._increment_block(*created)
+            else:
+                # Nothing to write: reported with the next block, like a pooled transaction
+                confirmed_round = self.state["block_height"] + 1
             
             return {
                 "status": "opted_in",
                 "tx_id": self._generate_tx_id(),
-                "initial_balance": self.users[address]["reputation"]
+                "initial_balance": self.users[address]["reputation"],
+                "confirmed_round": confirmed_round
             }
     
+    def _ensure_user(self, address: str) -> List[Tuple[str, str]]:
+        """
+        Create a user record if missing (caller must hold the lock)
+        Returns the keys of the records changed, for the caller to persist
+        with the rest of its transition.
+        """
+        if address in self.users:
+            return []
+        self._touch(("users", address), ("state", "user_count"))
+        self.users[address] = self._new_user(address)
+        self.state["user_count"] += 1
+        self._emit("ValidatorOptedIn", address=address)
+        return [("users", address), ("state", "user_count")]
+    
+    def _reputation(self, address: str) -> int:
+        """Reputation of a user, counting one not created yet at its initial balance"""
+        user = self.users.get(address)
+        return INITIAL_REPUTATION if user is None else user["reputation"]
+    
+    def _new_user(self, address: str) -> Dict[str, Any]:
+        return {
+            "address": address,
+            "reputation": INITIAL_REPUTATION,
+            "created_at": int(time.time()),
+            "votes": []
+        }
+    
+    def get_claims(
+        self,
+        status: Optional[str] = None,
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get claims in claim id order, optionally filtered by status"""
+        if self.storage.lazy:
+            return self.storage.query_claims(status, after_id, limit)
+        
+        claims = [
+            claim for claim in self.view.values("claims")
+            if claim["claim_id"] > after_id and (status is None or claim["status"] == status)
+        ]
+        claims.sort(key=lambda claim: claim["claim_id"])
+        return claims[:limit]
+    
     def get_user_balance(self, address: str) -> int:
         """Get user's reputation balance"""
-        user = self.users.get(address, {})
+        user = self.view.get("users", address) or {}
         return user.get("reputation", 0)
     
+    @ledger_transaction
     def submit_vote(self, claim_id: int, voter: str, vote: bool, stake: int) -> Dict[str, Any]:
         """Submit a vote on a claim"""
-        with self.lock:
+        with self._transaction():
             # Check if claim exists
             if str(claim_id) not in self.claims:
                 raise Exception(f"Claim {claim_id} not found")
+            if self.claims[str(claim_id)].get("settled"):
+                raise Exception(f"Voting on claim {claim_id} has ended")
             
-            # Check if user has enough reputation
-            if voter not in self.users:
-                self.opt_in_user(voter)
-            
-            user_balance = self.users[voter]["reputation"]
+            # Check if user has enough reputation (before creating the user,
+            # so a rejected vote changes nothing)
+            user_balance = self._reputation(voter)
             if user_balance < stake:
                 raise Exception(f"Insufficient reputation: {user_balance} < {stake}")
             
@@ -158,7 +783,10 @@ class MockBlockchain:
             if vote_key in self.votes:
                 raise Exception(f"Already voted on claim {claim_id}")
             
+            created = self._ensure_user(voter)
+            
             # Deduct stake from user
+            self._touch(("users", voter), ("votes", vote_key), ("claims", str(claim_id)))
             self.users[voter]["reputation"] -= stake
             
             # Record vote
@@ -169,6 +797,7 @@ class MockBlockchain:
                 "stake": stake,
                 "timestamp": int(time.time())
             }
+            self._index_vote(vote_key, self.votes[vote_key])
             
             # Update claim vote counts
             claim = self.claims[str(claim_id)]
@@ -178,162 +807,656 @@ class MockBlockchain:
                 claim["no_votes"] += 1
             claim["total_stake"] += stake
             
-            # Save data
-            self._save_json(self.users_file, self.users)
-            self._save_json(self.votes_file, self.votes)
-            self._save_json(self.claims_file, self.claims)
-            
-            self._increment_block()
+            self._emit("VoteCast", claim_id=claim_id, voter=voter, vote=vote, stake=stake)
+            confirmed_round = self._increment_block(
+                ("users", voter),
+                ("votes", vote_key),
+                ("claims", str(claim_id)),
+                *created
+            )
             
             return {
                 "tx_id": self._generate_tx_id(),
-                "status": "vote_submitted"
+                "status": "vote_submitted",
+                "confirmed_round": confirmed_round
             }
     
+    def get_votes_for_claim(self, claim_id: int) -> List[Dict[str, Any]]:
+        """Get all votes cast on a claim"""
+        height = self.view.head
+        vote_keys = self._vote_keys_for_claim(claim_id)
+        votes = [self.view.get("votes", key, height) for key in vote_keys]
+        return [vote for vote in votes if vote is not None]
+    
+    def get_votes_by_voter(self, voter: str) -> List[Dict[str, Any]]:
+        """Get a voter's voting history"""
+        height = self.view.head
+        claim_ids = self._claim_ids_for_voter(voter)
+        votes = [self.view.get("votes", f"{voter}_{claim_id}", height) for claim_id in claim_ids]
+        return [vote for vote in votes if vote is not None]
+    
     # Prediction Market Methods
     
-    def create_market(self, claim_id: int, initial_liquidity: float) -> Dict[str, Any]:
-        """Create a prediction market for a claim"""
-        with self.lock:
+    @ledger_transaction
+    def create_market(self, claim_id: int, initial_liquidity: float, amm: str = DEFAULT_AMM) -> Dict[str, Any]:
+        """Create a prediction market for a claim, priced by the named AMM"""
+        with self._transaction():
             # Check if claim exists
             if str(claim_id) not in self.claims:
                 raise Exception(f"Claim {claim_id} not found")
             
             # Check if market already exists
-            for market in self.markets.values():
-                if market["claim_id"] == claim_id:
-                    raise Exception(f"Market already exists for claim {claim_id}")
+            if self._market_for_claim(claim_id) is not None:
+                raise Exception(f"Market already exists for claim {claim_id}")
+            
+            engine = create_amm(amm, initial_liquidity)
+            yes_stake, no_stake = engine.initial_state(initial_liquidity)
+            yes_price, no_price = engine.prices(yes_stake, no_stake)
             
             # Create market
+            self._touch(("state", "market_counter"), ("markets", str(self.state["market_counter"] + 1)))
             self.state["market_counter"] += 1
             market_id = self.state["market_counter"]
             
             market = {
                 "market_id": market_id,
                 "claim_id": claim_id,
-                "total_yes_stake": initial_liquidity / 2,
-                "total_no_stake": initial_liquidity / 2,
-                "yes_price": 0.5,
-                "no_price": 0.5,
+                "total_yes_stake": yes_stake,
+                "total_no_stake": no_stake,
+                "yes_price": yes_price,
+                "no_price": no_price,
                 "created_at": int(time.time()),
                 "expires_at": int(time.time()) + 86400,  # 24 hours
                 "resolved": False,
                 "outcome": None,
-                "positions": {}
+                "positions": {},
+                **engine.params()
             }
             
             self.markets[str(market_id)] = market
-            self._save_json(self.markets_file, self.markets)
-            self._save_json(self.state_file, self.state)
+            self._index_market(market)
+            if self.scheduler:
+                self.scheduler.schedule(market["expires_at"], "market", market_id)
             
-            self._increment_block()
+            self._emit("MarketCreated", market_id=market_id, claim_id=claim_id, amm=amm)
+            self._increment_block(("markets", str(market_id)), ("state", "market_counter"))
             
             return {
                 "market_id": market_id,
                 "tx_id": self._generate_tx_id(),
-                "yes_price": 0.5,
-                "no_price": 0.5
+                "yes_price": yes_price,
+                "no_price": no_price
             }
     
+    @ledger_transaction
     def place_bet(self, market_id: int, user: str, position: str, amount: float) -> Dict[str, Any]:
         """Place a bet on a prediction market"""
-        with self.lock:
+        with self._transaction():
             if str(market_id) not in self.markets:
                 raise Exception(f"Market {market_id} not found")
             
+            self._touch(("markets", str(market_id)))
             market = self.markets[str(market_id)]
             
             # Check if market is still open
             if market["resolved"] or time.time() > market["expires_at"]:
                 raise Exception("Market is closed")
             
-            # Calculate shares using constant product formula
-            if position == "YES":
-                current_stake = market["total_yes_stake"]
-                opposite_stake = market["total_no_stake"]
-                
-                k = current_stake * opposite_stake
-                new_stake = current_stake + amount
-                new_opposite = k / new_stake
-                shares_bought = opposite_stake - new_opposite
-                
-                market["total_yes_stake"] = new_stake
-                market["total_no_stake"] = new_opposite
-            else:
-                current_stake = market["total_no_stake"]
-                opposite_stake = market["total_yes_stake"]
-                
-                k = current_stake * opposite_stake
-                new_stake = current_stake + amount
-                new_opposite = k / new_stake
-                shares_bought = opposite_stake - new_opposite
-                
-                market["total_no_stake"] = new_stake
-                market["total_yes_stake"] = new_opposite
-            
-            # Recalculate prices
-            total = market["total_yes_stake"] + market["total_no_stake"]
-            market["yes_price"] = market["total_yes_stake"] / total
-            market["no_price"] = market["total_no_stake"] / total
-            
-            # Store position
-            position_key = f"{user}_{position}"
-            if position_key not in market["positions"]:
-                market["positions"][position_key] = {
-                    "user": user,
-                    "position": position,
-                    "shares": 0,
-                    "amount": 0
-                }
-            
-            market["positions"][position_key]["shares"] += shares_bought
-            market["positions"][position_key]["amount"] += amount
-            
-            self._save_json(self.markets_file, self.markets)
-            self._increment_block()
+            # The stake is paid in reputation up front; resolution pays out
+            # the shares it bought, or refunds it
+            if amount <= 0 or amount != int(amount):
+                raise Exception(f"Bets are placed in whole units of reputation, got {amount}")
+            amount = int(amount)
+            balance = self._reputation(user)
+            if balance < amount:
+                raise Exception(f"Insufficient reputation: {balance} < {amount}")
+            created = self._ensure_user(user)
+            self._touch(("users", user))
+            self.users[user]["reputation"] -= amount
+            
+            if self.batch_auctions:
+                # Filled at the block's clearing price when the block is sealed
+                fill = {"tx_id": self._generate_tx_id(), "status": "pending"}
+                orders = self._auction_orders.setdefault(str(market_id), [])
+                orders.append((user, position, amount, fill))
+                if self._group is not None:
+                    self._group["undo"].append(lambda: orders.remove((user, position, amount, fill)))
+                self._persist(("users", user), *created)
+                return fill
+            
+            shares_bought = self._trade(market, position, amount)
+            self._add_position(market, user, position, shares_bought, amount)
+            
+            self._emit(
+                "BetPlaced", market_id=market_id, user=user, position=position, amount=amount, shares=shares_bought
+            )
+            self._increment_block(("markets", str(market_id)), ("users", user), *created)
             
             return {
                 "tx_id": self._generate_tx_id(),
                 "shares_bought": shares_bought,
                 "avg_price": amount / shares_bought if shares_bought > 0 else 0,
-                "potential_payout": shares_bought
+                "potential_payout": amm_for_market(market).redemption_value(shares_bought, amount)
+            }
+    
+    def _trade(self, market: Dict[str, Any], position: str, amount: float) -> float:
+        """Move a market along its AMM curve; returns the shares bought"""
+        engine = amm_for_market(market)
+        shares_bought, yes_stake, no_stake = engine.trade(
+            market["total_yes_stake"], market["total_no_stake"], position, amount
+        )
+        market["total_yes_stake"] = yes_stake
+        market["total_no_stake"] = no_stake
+        market["yes_price"], market["no_price"] = engine.prices(yes_stake, no_stake)
+        return shares_bought
+    
+    def _add_position(self, market: Dict[str, Any], user: str, position: str, shares: float, amount: float):
+        position_key = f"{user}_{position}"
+        if position_key not in market["positions"]:
+            market["positions"][position_key] = {
+                "user": user,
+                "position": position,
+                "shares": 0,
+                "amount": 0
             }
+        
+        market["positions"][position_key]["shares"] += shares
+        market["positions"][position_key]["amount"] += amount
+    
+    def _clear_auctions(self) -> List[Tuple[str, str]]:
+        """
+        Clear every market's pooled bets at one uniform price (caller must hold the lock)
+
+        Opposing YES and NO money is matched between bettors and only the
+        net imbalance moves the curve, so the order bets arrived in within a
+        block does not matter. The net side gets the shares the engine
+        quotes for the imbalance; matched money on each side buys shares at
+        that side's marginal price after the trade, in the engine's share
+        units. Each side's shares are split pro rata to its bets.
+        Returns the keys of the markets changed.
+        """
+        keys = []
+        for market_id, orders in self._auction_orders.items():
+            if not orders:
+                continue
+            market = self.markets.get(market_id)
+            if market is None or market["resolved"] or time.time() > market["expires_at"]:
+                # Give back the stakes taken when the bets were placed
+                for user, _, amount, fill in orders:
+                    self.users[user]["reputation"] += amount
+                    keys.append(("users", user))
+                    fill.update(status="rejected", error="Market is closed")
+                continue
+            
+            amounts = np.array([amount for _, _, amount, _ in orders], dtype=np.float64)
+            is_yes = np.array([position == "YES" for _, position, _, _ in orders])
+            totals = {"YES": float(amounts[is_yes].sum()), "NO": float(amounts[~is_yes].sum())}
+            net_side = "YES" if totals["YES"] > totals["NO"] else "NO"
+            net = totals[net_side] - min(totals.values())
+            net_shares = self._trade(market, net_side, net) if net else 0.0
+            
+            engine = amm_for_market(market)
+            matched = min(totals.values())
+            side_shares = {
+                side: matched / engine.marginal_price(market["total_yes_stake"], market["total_no_stake"], side)
+                if matched else 0.0
+                for side in totals
+            }
+            side_shares[net_side] += net_shares
+            
+            # Shares per unit of reputation bet on each side
+            rates = {side: side_shares[side] / totals[side] if totals[side] else 0.0 for side in totals}
+            shares = amounts * np.where(is_yes, rates["YES"], rates["NO"])
+            prices = {side: 1.0 / rate if rate else 0.0 for side, rate in rates.items()}
+            
+            for (user, position, amount, fill), bought in zip(orders, shares.tolist()):
+                self._add_position(market, user, position, bought, amount)
+                self._emit(
+                    "BetPlaced", market_id=market["market_id"], user=user, position=position, amount=amount,
+                    shares=bought, tx_id=fill["tx_id"]
+                )
+                fill.update(
+                    status="filled",
+                    shares_bought=bought,
+                    avg_price=prices[position],
+                    potential_payout=engine.redemption_value(bought, amount),
+                    clearing_price=market["yes_price"]
+                )
+            keys.append(("markets", market_id))
+        
+        self._auction_orders = {}
+        return keys
+    
+    def get_market(self, market_id: int) -> Optional[Dict[str, Any]]:
+        """Get a market by ID"""
+        return self.view.get("markets", str(market_id))
     
     def get_markets(self) -> List[Dict[str, Any]]:
         """Get all markets"""
-        return list(self.markets.values())
+        return self.view.values("markets")
     
+    @ledger_transaction
     def resolve_market(self, market_id: int, outcome: bool) -> bool:
         """Resolve a prediction market"""
-        with self.lock:
+        with self._transaction():
             if str(market_id) not in self.markets:
                 return False
             
-            market = self.markets[str(market_id)]
-            market["resolved"] = True
-            market["outcome"] = outcome
-            
-            # Distribute winnings (simplified)
-            # In production, this would update user balances
-            
-            self._save_json(self.markets_file, self.markets)
-            self._increment_block()
+            self._touch(("markets", str(market_id)))
+            keys = self._settle_market(self.markets[str(market_id)], outcome)
+            self._increment_block(*keys)
             
             return True
     
+    def _settle_market(self, market: Dict[str, Any], outcome: Optional[bool]) -> List[Tuple[str, str]]:
+        """
+        Resolve a market record and pay out its positions (caller must hold the lock)
+        Winning positions redeem for what their shares are worth in the
+        market's AMM (see AMM.redemption_value); a market resolved without
+        an outcome refunds the amount every position was charged. Payouts are computed in one vectorized pass over all
+        positions and credited once per user. Returns the keys of the
+        records changed.
+        """
+        market["resolved"] = True
+        market["outcome"] = outcome
+        keys = [("markets", str(market["market_id"]))]
+        
+        positions = list(market["positions"].values())
+        if not positions:
+            market["total_payout"] = 0
+            self._emit("MarketResolved", market_id=market["market_id"], outcome=outcome, total_payout=0)
+            return keys
+        
+        # Column arrays over all positions, extracted without a Python-level loop
+        count = len(positions)
+        users = list(map(itemgetter("user"), positions))
+        owners = dict(zip(dict.fromkeys(users), range(count)))
+        owner = np.fromiter(map(owners.__getitem__, users), dtype=np.intp, count=count)
+        amounts = np.fromiter(map(itemgetter("amount"), positions), dtype=np.float64, count=count)
+        if outcome is None:
+            payouts = amounts
+        else:
+            shares = np.fromiter(map(itemgetter("shares"), positions), dtype=np.float64, count=count)
+            is_yes = np.fromiter(map("YES".__eq__, map(itemgetter("position"), positions)), dtype=bool, count=count)
+            value = amm_for_market(market).redemption_value(shares, amounts)
+            payouts = np.where(is_yes == outcome, value, 0.0)
+        
+        credits = np.floor(np.bincount(owner, weights=payouts, minlength=len(owners))).astype(np.int64)
+        
+        paid = []
+        for address, credit in zip(owners, credits.tolist()):
+            if credit <= 0:
+                continue
+            user = self.users.get(address)
+            if user is None:
+                # Bets are charged to an existing account; never mint one here
+                logger.warning(f"Market {market['market_id']} position holder {address} has no account")
+                continue
+            self._touch(("users", address))
+            user["reputation"] += credit
+            paid.append((address, credit))
+        
+        market["total_payout"] = sum(credit for _, credit in paid)
+        self._emit("MarketResolved", market_id=market["market_id"], outcome=outcome, total_payout=market["total_payout"])
+        return keys + [("users", address) for address, _ in paid]
+    
+    def _settle_claim(self, claim: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Tally a claim's votes, set its verdict and pay out the stakes
+        (caller must hold the lock). Winners get their stake back plus a
+        share of the losing side's stake in proportion to their own; without
+        consensus every stake is refunded. Returns the keys of the records changed.
+        """
+        claim_id = claim["claim_id"]
+        votes = [self.votes[key] for key in self._vote_keys_for_claim(claim_id) if key in self.votes]
+        yes_stake = sum(vote["stake"] for vote in votes if vote["vote"])
+        total_stake = sum(vote["stake"] for vote in votes)
+        
+        # A status set by update_claim_status before the deadline stands
+        if claim["status"] == "UNVERIFIED" and total_stake:
+            if yes_stake >= total_stake * CONSENSUS_THRESHOLD:
+                claim["status"] = "VERIFIED"
+            elif total_stake - yes_stake >= total_stake * CONSENSUS_THRESHOLD:
+                claim["status"] = "FALSE"
+            else:
+                claim["status"] = "DISPUTED"
+        claim["settled"] = True
+        claim["settled_at"] = int(time.time())
+        self._emit("ValidationResolved", claim_id=claim_id, status=claim["status"])
+        
+        keys = {("claims", str(claim_id)): None}
+        winning_side = MARKET_OUTCOMES.get(claim["status"])
+        winning_stake = yes_stake if winning_side else total_stake - yes_stake
+        losing_stake = total_stake - winning_stake
+        for vote in votes:
+            if winning_side is None:
+                payout = vote["stake"]
+            elif vote["vote"] == winning_side:
+                payout = vote["stake"]
+                if winning_stake:
+                    payout += vote["stake"] * losing_stake // winning_stake
+            else:
+                continue
+            self.users[vote["voter"]]["reputation"] += payout
+            keys[("users", vote["voter"])] = None
+        
+        return list(keys)
+    
+    def _settle_due(self, due: List[Tuple[str, int]]) -> int:
+        """
+        Settle a batch of claims and markets whose deadline has passed
+        The whole batch is applied under one lock acquisition and recorded
+        as one transition. Returns the number of records settled.
+        """
+        with self._transaction():
+            keys: Dict[Tuple[str, str], None] = {}
+            settled = 0
+            for kind, record_id in due:
+                if kind == "claim":
+                    claim = self.claims.get(str(record_id))
+                    if claim is None or claim.get("settled"):
+                        continue
+                    changed = self._settle_claim(claim)
+                else:
+                    market = self.markets.get(str(record_id))
+                    if market is None or market["resolved"]:
+                        continue
+                    claim = self.claims.get(str(market["claim_id"])) or {}
+                    changed = self._settle_market(market, MARKET_OUTCOMES.get(claim.get("status")))
+                keys.update(dict.fromkeys(changed))
+                settled += 1
+            
+            if keys:
+                self._increment_block(*keys)
+            return settled
+    
+    def _open_deadlines(self) -> List[Tuple[int, str, int]]:
+        """Deadlines of every unsettled claim and unresolved market, for the scheduler"""
+        if self.storage.lazy:
+            return self.storage.open_deadlines()
+        
+        deadlines = [
+            (claim["voting_ends_at"], "claim", claim["claim_id"])
+            for claim in self.claims.values() if not claim.get("settled")
+        ]
+        deadlines += [
+            (market["expires_at"], "market", market["market_id"])
+            for market in self.markets.values() if not market["resolved"]
+        ]
+        return deadlines
+    
     def get_status(self) -> Dict[str, Any]:
         """Get blockchain status"""
+        height = self.view.head
+        state = dict(self.view.items("state", height))
         return {
-            "block_height": self.state["block_height"],
-            "total_claims": self.state["claim_counter"],
-            "total_markets": self.state["market_counter"],
-            "total_users": len(self.users),
-            "timestamp": self.state["timestamp"]
+            "block_height": height,
+            "total_claims": state["claim_counter"],
+            "total_markets": state["market_counter"],
+            "total_users": state["user_count"],
+            "timestamp": state["timestamp"],
+            "next_event_seq": self.events.next_seq
         }
+    
+    def get_state_at(self, block_height: int) -> Dict[str, Any]:
+        """Get a consistent snapshot of all collections as of a recent block"""
+        return self.view.snapshot(block_height)
+    
+    def get_state_root(self, block_height: Optional[int] = None) -> str:
+        """Merkle root over all records as of a recent block"""
+        height = self.view.check_height(block_height)
+        if height not in self._state_roots:
+            raise ValueError(f"No state root retained for block {height}")
+        return ref_hash(self._state_roots[height]).hex()
+    
+    def get_proof(self, collection: str, key: str, block_height: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Merkle proof of a record's value (or absence) as of a recent block
+        Check it with verify_proof, without trusting the chain that served it.
+        """
+        height = self.view.check_height(block_height)
+        if height not in self._state_roots:
+            raise ValueError(f"No state root retained for block {height}")
+        root = self._state_roots[height]
+        return {
+            "collection": collection,
+            "key": str(key),
+            "block_height": height,
+            "value": self.view.get(collection, str(key), height),
+            "state_root": ref_hash(root).hex(),
+            "proof": self.merkle.prove(collection, str(key), root)
+        }
+    
+    @staticmethod
+    def verify_proof(proof: Dict[str, Any]) -> bool:
+        """Check a proof returned by get_proof against its state root"""
+        return verify_merkle_proof(
+            proof["state_root"], proof["collection"], proof["key"], proof["value"], proof["proof"]
+        )
+    
+    def subscribe(self, from_seq: Optional[int] = None):
+        """
+        Iterate over committed events from a sequence number (default: new ones)
+        Raises EventsLost if `from_seq` has already left the ring buffer.
+        """
+        return self.events.subscribe(from_seq)
+    
+    def subscribe_async(self, from_seq: Optional[int] = None):
+        """Async generator version of subscribe"""
+        return self.events.subscribe_async(from_seq)
+    
+    def get_events(self, from_seq: int, limit: int = 100, timeout: float = 0) -> List[Dict[str, Any]]:
+        """Up to `limit` events from a sequence number, waiting up to `timeout` seconds for new ones"""
+        return self.events.read(from_seq, limit, timeout)
+    
+    def get_commit_stats(self) -> Optional[Dict[str, Any]]:
+        """Achieved group commit batch sizes, if group commit is enabled"""
+        if self.committer:
+            return self.committer.stats()
+        return None
+    
+    def get_block_stats(self) -> Optional[Dict[str, Any]]:
+        """Block fill statistics, if round-based block production is enabled"""
+        if self.producer:
+            return self.producer.stats()
+        return None
+    
+    def get_settlement_stats(self) -> Optional[Dict[str, Any]]:
+        """Claims and markets settled so far, if auto-settlement is enabled"""
+        if self.scheduler:
+            return self.scheduler.stats()
+        return None
+    
+    def close(self):
+        """Flush and close the storage engine"""
+        if self.scheduler:
+            self.scheduler.close()
+        if self.producer:
+            self.producer.close()
+        self.events.close()
+        with self.lock:
+            if self.committer:
+                self.committer.close()
+            self.storage.close()
+
+class BlockProducer:
+    """Background thread that seals pooled transactions every round"""
+    
+    def __init__(self, chain: MockBlockchain, interval: float, max_txns: int):
+        self.chain = chain
+        self.interval = interval
+        self.max_txns = max_txns
+        
+        self.blocks = 0
+        self.transactions = 0
+        self.max_fill = 0
+        
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="mock-chain-producer", daemon=True)
+        self._thread.start()
+    
+    def wake(self):
+        """Seal the pending block now instead of waiting for the interval"""
+        self._wakeup.set()
+    
+    def _seal(self):
+        try:
+            sealed = self.chain._seal_block()
+        except Exception as e:
+            logger.error(f"Block production failed: {e}")
+            return
+        if sealed:
+            self.blocks += 1
+            self.transactions += sealed
+            self.max_fill = max(self.max_fill, sealed)
+    
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self._seal()
+        # Flush whatever was pooled before shutdown
+        self._seal()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Blocks sealed so far and their average fill"""
+        return {
+            "blocks": self.blocks,
+            "transactions": self.transactions,
+            "avg_block_fill": self.transactions / self.blocks if self.blocks else 0,
+            "max_block_fill": self.max_fill,
+            "pending_transactions": self.chain._pending_txns
+        }
+    
+    def close(self):
+        """Seal the last pending block and stop producing"""
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join()
+
+class ExpiryScheduler:
+    """
+    Background thread that settles claims and markets at their deadline
+
+    Deadlines are kept in a min-heap, so the thread sleeps until the
+    earliest one and settling costs O(log n) per due item instead of a
+    periodic scan. Due items are popped in batches and each batch is
+    settled under one chain lock acquisition. Entries for records that were
+    settled or removed in the meantime are skipped when they come due.
+    """
+    
+    def __init__(self, chain: MockBlockchain, deadlines: List[Tuple[int, str, int]], batch_size: int = 256):
+        self.chain = chain
+        self.batch_size = batch_size
+        
+        self.batches = 0
+        self.settled = 0
+        
+        self._heap = list(deadlines)
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="mock-chain-scheduler", daemon=True)
+        self._thread.start()
+    
+    def schedule(self, deadline: int, kind: str, record_id: int):
+        """Settle a claim or market once `deadline` (a unix time) has passed"""
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            heapq.heappush(self._heap, (deadline, kind, record_id))
+        if earliest is None or deadline < earliest:
+            self._wakeup.set()
+    
+    def _pop_due(self) -> List[Tuple[str, int]]:
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                _, kind, record_id = heapq.heappop(self._heap)
+                due.append((kind, record_id))
+        return due
+    
+    def _next_wait(self) -> Optional[float]:
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.time())
+    
+    def _run(self):
+        while not self._stopped:
+            due = self._pop_due()
+            if due:
+                try:
+                    self.settled += self.chain._settle_due(due)
+                    self.batches += 1
+                except Exception as e:
+                    logger.error(f"Settlement failed: {e}")
+                continue
+            
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Records settled so far and deadlines still pending"""
+        return {
+            "batches": self.batches,
+            "settled": self.settled,
+            "pending": len(self._heap)
+        }
+    
+    def close(self):
+        """Stop settling"""
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join()
+
+# Global instance, created on first use so that importing this module has
+# no side effects and workers sharing a mock chain daemon never open the
+# data directory themselves
+blockchain = None
+_blockchain_lock = threading.Lock()
+_blockchain_options: Dict[str, Any] = {}
+
+def configure_blockchain(**options):
+    """
+    Set the MockBlockchain arguments get_blockchain uses on first call
+    (e.g. data_dir, or storage="memory" in tests). Defaults come from the
+    MOCK_CHAIN_DATA_DIR and MOCK_CHAIN_STORAGE environment variables.
+    """
+    with _blockchain_lock:
+        if blockchain is not None:
+            raise RuntimeError("Blockchain already created; call reset_blockchain() first")
+        _blockchain_options.clear()
+        _blockchain_options.update(options)
 
-# Global instance
-blockchain = MockBlockchain()
+def reset_blockchain():
+    """Close and forget the global instance (for tests)"""
+    global blockchain
+    with _blockchain_lock:
+        if isinstance(blockchain, MockBlockchain):
+            blockchain.close()
+        blockchain = None
 
 def get_blockchain():
-    """Get blockchain instance"""
-    return blockchain
\ No newline at end of file
+    """
+    Get blockchain instance
+    Returns a client for the shared mock chain daemon when MOCK_CHAIN_URL is set
+    """
+    global blockchain
+    if blockchain is None:
+        with _blockchain_lock:
+            if blockchain is None:
+                chain_url = os.environ.get("MOCK_CHAIN_URL")
+                if chain_url:
+                    from mock_chain_server import MockBlockchainClient
+                    blockchain = MockBlockchainClient(chain_url)
+                else:
+                    options = {
+                        "data_dir": os.environ.get("MOCK_CHAIN_DATA_DIR", "./blockchain_data"),
+                        "storage": os.environ.get("MOCK_CHAIN_STORAGE", "wal"),
+                        **_blockchain_options
+                    }
+                    blockchain = MockBlockchain(**options)
+    return blockchain
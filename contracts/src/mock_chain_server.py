@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Mock Blockchain Daemon
+Serves one MockBlockchain to several API worker processes over HTTP
+"""
+
+import os
+import sys
+import json
+import socket
+import logging
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Dict, Any, Iterator, Optional
+from urllib.parse import urlparse
+
+from mock_blockchain import MockBlockchain
+
+logger = logging.getLogger(__name__)
+
+# Chain methods callable through the daemon
+CHAIN_METHODS = {
+    "submit_claim",
+    "submit_group",
+    "get_claim",
+    "get_claims",
+    "update_claim_status",
+    "opt_in_user",
+    "get_user_balance",
+    "submit_vote",
+    "get_votes_for_claim",
+    "get_votes_by_voter",
+    "create_market",
+    "place_bet",
+    "get_market",
+    "get_markets",
+    "resolve_market",
+    "get_status",
+    "get_state_at",
+    "get_state_root",
+    "get_events",
+    "get_proof",
+    "get_commit_stats",
+    "get_block_stats",
+    "get_settlement_stats"
+}
+
+
+class ChainRequestHandler(BaseHTTPRequestHandler):
+    """Dispatches POST /rpc/<method> calls to the served chain"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"result": self.server.chain.get_status()})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        method = self.path.rsplit("/", 1)[-1]
+        if not self.path.startswith("/rpc/") or method not in CHAIN_METHODS:
+            self._send_json(404, {"error": f"Unknown method {method}"})
+            return
+
+        try:
+            result = getattr(self.server.chain, method)(
+                *request.get("args", []),
+                **request.get("kwargs", {})
+            )
+        except Exception as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self._send_json(200, {"result": result})
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class ChainHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server on a TCP port"""
+
+    daemon_threads = True
+
+    def __init__(self, address, chain: MockBlockchain):
+        self.chain = chain
+        super().__init__(address, ChainRequestHandler)
+
+
+class ChainUnixServer(ThreadingMixIn, UnixStreamServer):
+    """Threaded HTTP server on a Unix domain socket"""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, chain: MockBlockchain):
+        self.chain = chain
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, ChainRequestHandler)
+
+
+def create_server(url: str, chain: MockBlockchain):
+    """Create a daemon server listening on http://host:port or unix:///path"""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return ChainUnixServer(parsed.path, chain)
+    if parsed.scheme == "http":
+        return ChainHTTPServer((parsed.hostname or "127.0.0.1", parsed.port or 8765), chain)
+    raise ValueError(f"Unsupported mock chain URL: {url}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class MockBlockchainClient:
+    """
+    Thin client for a mock chain daemon
+
+    Exposes the same public methods as MockBlockchain. Each thread keeps one
+    persistent keep-alive connection to the daemon, so a call costs a
+    request/response on an open socket rather than a new connection.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url
+        self.timeout = timeout
+        self._parsed = urlparse(url)
+        if self._parsed.scheme not in ("unix", "http"):
+            raise ValueError(f"Unsupported mock chain URL: {url}")
+        self._local = threading.local()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._parsed.scheme == "unix":
+            return UnixHTTPConnection(self._parsed.path, self.timeout)
+        return http.client.HTTPConnection(
+            self._parsed.hostname or "127.0.0.1",
+            self._parsed.port or 8765,
+            timeout=self.timeout
+        )
+
+    def _request(self, conn: http.client.HTTPConnection, path: str, body: bytes) -> Dict[str, Any]:
+        conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return json.loads(response.read())
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        body = json.dumps({"args": args, "kwargs": kwargs}).encode()
+        path = f"/rpc/{method}"
+
+        conn: Optional[http.client.HTTPConnection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            reply = self._request(conn, path, body)
+        else:
+            try:
+                reply = self._request(conn, path, body)
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The daemon dropped our idle connection; reconnect once
+                conn.close()
+                conn = self._local.conn = self._connect()
+                reply = self._request(conn, path, body)
+
+        if "error" in reply:
+            raise Exception(reply["error"])
+        return reply["result"]
+
+    def subscribe(self, from_seq: Optional[int] = None, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Yield committed events from a sequence number by long-polling the daemon"""
+        seq = self._call("get_status")["next_event_seq"] if from_seq is None else from_seq
+        while True:
+            for event in self._call("get_events", seq, batch_size, 1.0):
+                seq = event["seq"] + 1
+                yield event
+
+    # Proofs are checked locally; that is the point of asking for them
+    verify_proof = staticmethod(MockBlockchain.verify_proof)
+
+    def __getattr__(self, name: str):
+        if name not in CHAIN_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+
+def main():
+    """Run the mock chain daemon"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a shared mock blockchain")
+    parser.add_argument(
+        "--listen",
+        default=os.environ.get("MOCK_CHAIN_URL", "http://127.0.0.1:8765"),
+        help="http://host:port or unix:///path/to/socket"
+    )
+    parser.add_argument("--data-dir", default="./blockchain_data", help="Chain data directory")
+    parser.add_argument("--storage", choices=["wal", "json", "sqlite"], default="wal", help="Storage engine")
+    parser.add_argument("--group-commit", action="store_true", help="Batch concurrent writes")
+    parser.add_argument("--block-interval", type=float, default=None, help="Seconds per block round")
+    parser.add_argument("--batch-auctions", action="store_true", help="Clear bets once per block (needs --block-interval)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    chain = MockBlockchain(
+        args.data_dir,
+        storage=args.storage,
+        group_commit=args.group_commit,
+        block_interval=args.block_interval,
+        batch_auctions=args.batch_auctions,
+        auto_settle=True
+    )
+    server = create_server(args.listen, chain)
+    logger.info(f"Mock chain serving {args.data_dir} on {args.listen}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        chain.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
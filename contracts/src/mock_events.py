@@ -0,0 +1,92 @@
+"""
+Mock Blockchain Event Stream
+Sequence-numbered log of committed chain events for subscribers
+"""
+
+import asyncio
+import threading
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+
+class EventsLost(Exception):
+    """A subscriber asked for events that have already left the ring buffer"""
+
+    def __init__(self, from_seq: int, oldest_seq: int):
+        super().__init__(f"Events before seq {oldest_seq} are no longer retained (asked for {from_seq})")
+        self.from_seq = from_seq
+        self.oldest_seq = oldest_seq
+
+
+class EventLog:
+    """
+    Append-only event log held in a bounded ring buffer
+
+    Every committed event gets the next sequence number, starting at 1.
+    Subscribers pull events from a sequence number at their own pace, so a
+    slow consumer never holds up the chain: it only risks falling more than
+    `capacity` events behind, in which case it gets EventsLost and has to
+    resynchronise from a snapshot before subscribing again.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.next_seq = 1
+        self._ring: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(1, self.next_seq - self.capacity)
+
+    def publish(self, events: List[Tuple[str, Dict[str, Any]]], block_height: int):
+        """Append (type, data) events committed at `block_height` and wake subscribers"""
+        if not events:
+            return
+        with self._cond:
+            for event_type, data in events:
+                self._ring[self.next_seq % self.capacity] = {
+                    "seq": self.next_seq,
+                    "type": event_type,
+                    "block_height": block_height,
+                    **data
+                }
+                self.next_seq += 1
+            self._cond.notify_all()
+
+    def read(self, from_seq: int, limit: int = 100, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` events starting at `from_seq`
+        Waits up to `timeout` seconds (forever if None) when there are none
+        yet; returns an empty list on timeout or once the log is closed.
+        """
+        with self._cond:
+            if from_seq < self.oldest_seq:
+                raise EventsLost(from_seq, self.oldest_seq)
+            if from_seq >= self.next_seq:
+                self._cond.wait_for(lambda: self.next_seq > from_seq or self._closed, timeout)
+            end = min(self.next_seq, from_seq + limit)
+            return [self._ring[seq % self.capacity] for seq in range(from_seq, end)]
+
+    def subscribe(self, from_seq: Optional[int] = None, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Yield events from `from_seq` (default: new events only) as they are committed"""
+        seq = self.next_seq if from_seq is None else from_seq
+        while not self._closed:
+            for event in self.read(seq, batch_size, timeout=1.0):
+                seq = event["seq"] + 1
+                yield event
+
+    async def subscribe_async(self, from_seq: Optional[int] = None, batch_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of subscribe; waiting happens off the event loop"""
+        seq = self.next_seq if from_seq is None else from_seq
+        while not self._closed:
+            events = await asyncio.to_thread(self.read, seq, batch_size, 1.0)
+            for event in events:
+                seq = event["seq"] + 1
+                yield event
+
+    def close(self):
+        """End every subscription"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,280 @@
+"""
+Mock Blockchain State Commitment
+Sparse Merkle tree over every record of the mock blockchain
+"""
+
+import json
+import hashlib
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Hash of an empty subtree
+EMPTY = bytes(32)
+
+# Domain separation between leaves and internal nodes
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+
+def _normalize(value: Any) -> Any:
+    # Storage engines may hand back integral floats for ints (e.g. SQLite
+    # REAL columns), which must not change a record's hash. Only containers
+    # and floats need a call, which keeps hashing large records cheap.
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _normalize(item) if isinstance(item, _NORMALIZED) else item for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) if isinstance(item, _NORMALIZED) else item for item in value]
+    return value
+
+
+_NORMALIZED = (dict, list, tuple, float)
+
+
+def key_hash(collection: str, key: str) -> bytes:
+    """Position of a record in the tree"""
+    return hashlib.sha256(f"{collection}/{key}".encode()).digest()
+
+
+def value_hash(value: Any) -> bytes:
+    """Hash of a record's canonical JSON encoding"""
+    encoded = json.dumps(_normalize(value), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).digest()
+
+
+def _leaf_hash(path: bytes, digest: bytes) -> bytes:
+    return hashlib.sha256(_LEAF + path + digest).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def _bit(path: bytes, depth: int) -> int:
+    return (path[depth >> 3] >> (7 - (depth & 7))) & 1
+
+
+class Leaf:
+    __slots__ = ("path", "digest", "hash")
+
+    def __init__(self, path: bytes, digest: bytes):
+        self.path = path
+        self.digest = digest
+        self.hash = _leaf_hash(path, digest)
+
+
+class Node:
+    __slots__ = ("left", "right", "hash")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.hash = _node_hash(ref_hash(left), ref_hash(right))
+
+
+def ref_hash(ref) -> bytes:
+    """
+    Hash of a subtree reference: a Leaf or Node, None for an empty
+    subtree, or (in a tree backed by a node store) the hash itself
+    """
+    if ref is None:
+        return EMPTY
+    if isinstance(ref, bytes):
+        return ref
+    return ref.hash
+
+
+# A node as stored by a node store: (hash, left, right, path, digest),
+# with left/right set for internal nodes and path/digest for leaves
+NodeRow = Tuple[bytes, Optional[bytes], Optional[bytes], Optional[bytes], Optional[bytes]]
+
+
+class SparseMerkleTree:
+    """
+    Compact sparse Merkle tree keyed by sha256("collection/key")
+
+    A subtree holding a single record is represented by that record's leaf
+    rather than a 256-level chain of nodes, so leaves sit about log2(n)
+    levels deep. Nodes are immutable: every update builds new paths to a
+    new root and leaves older roots intact, so proofs can still be served
+    against recent blocks. update_many applies a whole transition in one
+    pass, rehashing each node above the changed leaves once.
+
+    With a `store` (a lazy storage engine) nodes are persisted rather than
+    held in memory: commit() hands out the nodes created since the last
+    commit for the store to write, after which the tree refers to its root
+    by hash and loads nodes on demand through a bounded cache.
+    """
+
+    def __init__(self, store: Optional[Any] = None, root: Any = None, cache_size: int = 10000):
+        self.root = root
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._new: List[Any] = []
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str, Any]]) -> "SparseMerkleTree":
+        """Build an in-memory tree over (collection, key, value) records"""
+        tree = cls()
+        tree.update_many(records)
+        return tree
+
+    @property
+    def root_hash(self) -> str:
+        return ref_hash(self.root).hex()
+
+    def update(self, collection: str, key: str, value: Any):
+        """Insert, replace or (with value None) remove a record"""
+        self.update_many([(collection, key, value)])
+
+    def update_many(self, records: Iterable[Tuple[str, str, Any]]):
+        """Insert, replace or remove (value None) a batch of records"""
+        updates: Dict[bytes, Optional[Leaf]] = {}
+        for collection, key, value in records:
+            path = key_hash(collection, key)
+            updates[path] = None if value is None else self._leaf(path, value_hash(value))
+        if updates:
+            self.root = self._apply(self.root, sorted(updates.items(), key=itemgetter(0)), 0)
+
+    def _leaf(self, path: bytes, digest: bytes) -> Leaf:
+        leaf = Leaf(path, digest)
+        if self.store is not None:
+            self._new.append(leaf)
+        return leaf
+
+    def _node(self, left, right) -> Node:
+        node = Node(left, right)
+        if self.store is not None:
+            self._new.append(node)
+        return node
+
+    def _load(self, ref):
+        """Resolve a subtree reference to its Leaf or Node"""
+        if not isinstance(ref, bytes):
+            return ref
+        with self._cache_lock:
+            node = self._cache.get(ref)
+            if node is not None:
+                self._cache.move_to_end(ref)
+                return node
+
+        row = self.store.read_merkle_node(ref)
+        if row is None:
+            raise KeyError(f"Merkle node {ref.hex()} not in store")
+        left, right, path, digest = row
+        node = Leaf(path, digest) if path is not None else Node(left, right)
+        with self._cache_lock:
+            self._cache[ref] = node
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return node
+
+    def _apply(self, ref, updates: List[Tuple[bytes, Optional[Leaf]]], depth: int):
+        """Apply updates (sorted by path, all under this subtree) to a subtree"""
+        node = self._load(ref)
+        if not isinstance(node, Node):
+            # Empty or a single leaf: rebuild from the leaves that remain
+            if isinstance(node, Leaf) and all(path != node.path for path, _ in updates):
+                updates = sorted(updates + [(node.path, node)], key=itemgetter(0))
+            return self._build([leaf for _, leaf in updates if leaf is not None], depth)
+
+        split = bisect_left(updates, 1, key=lambda update: _bit(update[0], depth))
+        left = self._apply(node.left, updates[:split], depth + 1) if split else node.left
+        right = self._apply(node.right, updates[split:], depth + 1) if split < len(updates) else node.right
+
+        # Collapse a node left holding a single leaf back into that leaf
+        if left is None and right is None:
+            return None
+        if left is None or right is None:
+            child = self._load(left if right is None else right)
+            if isinstance(child, Leaf):
+                return child
+        return self._node(left, right)
+
+    def _build(self, leaves: List[Leaf], depth: int):
+        """Subtree over leaves (sorted by path) that share their first `depth` bits"""
+        if len(leaves) <= 1:
+            return leaves[0] if leaves else None
+        # Push the leaves down until their paths diverge
+        split = bisect_left(leaves, 1, key=lambda leaf: _bit(leaf.path, depth))
+        return self._node(self._build(leaves[:split], depth + 1), self._build(leaves[split:], depth + 1))
+
+    def commit(self) -> List[NodeRow]:
+        """
+        Nodes created since the last commit, as rows for the node store
+        The tree then refers to its root by hash, so it holds no more than
+        its cache in memory.
+        """
+        rows = []
+        for node in self._new:
+            if isinstance(node, Leaf):
+                rows.append((node.hash, None, None, node.path, node.digest))
+            else:
+                left = ref_hash(node.left) if node.left is not None else None
+                right = ref_hash(node.right) if node.right is not None else None
+                rows.append((node.hash, left, right, None, None))
+        self._new = []
+        if self.root is not None:
+            self.root = ref_hash(self.root)
+        return rows
+
+    def prove(self, collection: str, key: str, root=None) -> Dict[str, Any]:
+        """
+        Proof of a record's value (or absence) under a root
+        Lists the sibling hashes from the root down to where the record's
+        path ends, plus the leaf found there if it belongs to another record.
+        """
+        path = key_hash(collection, key)
+        node = self._load(self.root if root is None else root)
+        siblings: List[str] = []
+        depth = 0
+        while isinstance(node, Node):
+            if _bit(path, depth):
+                siblings.append(ref_hash(node.left).hex())
+                node = self._load(node.right)
+            else:
+                siblings.append(ref_hash(node.right).hex())
+                node = self._load(node.left)
+            depth += 1
+
+        other = None
+        if isinstance(node, Leaf) and node.path != path:
+            other = {"path": node.path.hex(), "digest": node.digest.hex()}
+        return {"siblings": siblings, "leaf": other}
+
+
+def verify_proof(state_root: str, collection: str, key: str, value: Any, proof: Dict[str, Any]) -> bool:
+    """
+    Check that a record has `value` (None for absent) under `state_root`
+    Needs only the proof, so API workers can verify chain responses
+    without trusting or re-reading the chain.
+    """
+    path = key_hash(collection, key)
+    siblings = [bytes.fromhex(sibling) for sibling in proof["siblings"]]
+    other = proof.get("leaf")
+
+    if value is not None:
+        if other is not None:
+            return False
+        node = _leaf_hash(path, value_hash(value))
+    elif other is None:
+        node = EMPTY
+    else:
+        # Absent: the path must end in a leaf of another record on the same prefix
+        other_path = bytes.fromhex(other["path"])
+        if other_path == path or any(_bit(other_path, d) != _bit(path, d) for d in range(len(siblings))):
+            return False
+        node = _leaf_hash(other_path, bytes.fromhex(other["digest"]))
+
+    for depth in reversed(range(len(siblings))):
+        if _bit(path, depth):
+            node = _node_hash(siblings[depth], node)
+        else:
+            node = _node_hash(node, siblings[depth])
+    return node.hex() == state_root
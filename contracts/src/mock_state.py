@@ -0,0 +1,165 @@
+"""
+Mock Blockchain Versioned State
+Copy-on-write snapshots of the mock blockchain keyed by block height
+"""
+
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+# Versions of one record, oldest first: ((block_height, record), ...)
+Versions = Tuple[Tuple[int, Any], ...]
+
+
+def freeze(value: Any) -> Any:
+    """
+    Copy of a JSON-like record (dicts, lists and scalars)
+    Several times faster than copy.deepcopy, which matters for markets
+    carrying many positions.
+    """
+    if isinstance(value, dict):
+        return {key: freeze(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [freeze(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+class VersionedState:
+    """
+    Multi-version view of the chain state for lock-free readers
+
+    Every committed record is frozen (copied) and stored together with
+    the block height it was written at. Readers pick the published head
+    height once and resolve each key to its newest version at or below it,
+    so they see a consistent state even while a writer is half way through
+    the next transition. Version tuples are replaced rather than mutated,
+    which keeps lookups safe without taking the writer lock.
+
+    Superseded versions older than `retain_blocks` behind the head are
+    pruned when their key is next written. Records returned by this class
+    are shared between readers and must be treated as read-only.
+
+    With a `base` (a lazy storage engine) only recently written keys are
+    versioned: everything else is read from the base, and keys that have
+    not been written within the retention window are dropped again.
+    """
+
+    def __init__(
+        self,
+        collections: Dict[str, Dict[str, Any]],
+        block_height: int,
+        retain_blocks: int = 128,
+        base: Optional[Any] = None
+    ):
+        self.retain_blocks = retain_blocks
+        self.head = block_height
+        self.oldest = block_height
+        self.base = base
+        self._recent = deque()
+        self._versions: Dict[str, Dict[str, Versions]] = {
+            name: {
+                key: ((block_height, freeze(value)),)
+                for key, value in records.items()
+            }
+            for name, records in collections.items()
+        }
+
+    def record(self, changes: List[Tuple[str, str, Any]], block_height: int):
+        """
+        Freeze the records changed at `block_height` (caller holds the writer lock)
+        Must run before the changes reach a lazy base
+        """
+        cutoff = self.head - self.retain_blocks
+        for name, key, value in changes:
+            frozen = (block_height, freeze(value))
+            versions = self._versions[name].get(key, ())
+
+            if not versions and self.base:
+                # Keep the value readers at older heights still expect
+                prior = self.base.read(name, key)
+                if prior is not None:
+                    versions = ((0, prior),)
+            if self.base:
+                self._recent.append((block_height, name, key))
+
+            if versions and versions[-1][0] == block_height:
+                versions = versions[:-1]
+            # Keep only the newest version at or below the retention cutoff
+            start = 0
+            while start + 1 < len(versions) and versions[start + 1][0] <= cutoff:
+                start += 1
+
+            self._versions[name][key] = versions[start:] + (frozen,)
+
+    def publish(self, block_height: int):
+        """Make versions up to `block_height` visible to readers"""
+        self.head = block_height
+        self.oldest = max(self.oldest, block_height - self.retain_blocks)
+
+        # The base already holds the newest value of keys not written since
+        cutoff = block_height - self.retain_blocks
+        while self._recent and self._recent[0][0] <= cutoff:
+            _, name, key = self._recent.popleft()
+            versions = self._versions[name].get(key)
+            if versions and versions[-1][0] <= cutoff:
+                del self._versions[name][key]
+
+    def _resolve(self, versions: Versions, block_height: int) -> Optional[Any]:
+        index = bisect_right(versions, block_height, key=lambda version: version[0])
+        if index == 0:
+            return None
+        return versions[index - 1][1]
+
+    def check_height(self, block_height: Optional[int]) -> int:
+        """
+        Resolve a requested block height (None for the published head)
+        Raises ValueError for heights not produced yet or no longer retained.
+        """
+        if block_height is None:
+            return self.head
+        if block_height > self.head:
+            raise ValueError(f"Block {block_height} has not been produced yet")
+        if block_height < self.oldest:
+            raise ValueError(f"Block {block_height} is no longer retained (oldest is {self.oldest})")
+        return block_height
+
+    def get(self, name: str, key: str, block_height: Optional[int] = None) -> Optional[Any]:
+        """Get a record as of a block height (defaults to the published head)"""
+        height = self.check_height(block_height)
+        versions = self._versions[name].get(key)
+        if not versions and self.base:
+            value = self.base.read(name, key)
+            # A writer may have versioned the key while we were reading
+            versions = self._versions[name].get(key)
+            if not versions:
+                return value
+        if not versions:
+            return None
+        return self._resolve(versions, height)
+
+    def items(self, name: str, block_height: Optional[int] = None) -> List[Tuple[str, Any]]:
+        """All records of a collection as of a block height"""
+        height = self.check_height(block_height)
+        if self.base:
+            keys = self.base.read_keys(name)
+            stored = set(keys)
+            keys += [key for key in list(self._versions[name]) if key not in stored]
+            values = ((key, self.get(name, key, height)) for key in keys)
+        else:
+            values = (
+                (key, self._resolve(versions, height))
+                for key, versions in list(self._versions[name].items())
+            )
+        return [(key, value) for key, value in values if value is not None]
+
+    def values(self, name: str, block_height: Optional[int] = None) -> List[Any]:
+        """All record values of a collection as of a block height"""
+        return [value for _, value in self.items(name, block_height)]
+
+    def snapshot(self, block_height: Optional[int] = None) -> Dict[str, Any]:
+        """Every collection as of a block height"""
+        height = self.check_height(block_height)
+        result: Dict[str, Any] = {"block_height": height}
+        for name in self._versions:
+            result[name] = dict(self.items(name, height))
+        return result
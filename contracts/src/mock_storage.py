@@ -0,0 +1,725 @@
+"""
+Mock Blockchain Storage Engines
+Pluggable persistence backends for the mock blockchain
+"""
+
+import json
+import os
+import time
+import logging
+import sqlite3
+import threading
+from collections import deque, OrderedDict
+from typing import Dict, Any, Iterator, List, Tuple, Optional
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Collections persisted by the mock blockchain
+COLLECTIONS = ("claims", "votes", "markets", "users", "state")
+
+# A single record change: (collection, key, value)
+Change = Tuple[str, str, Any]
+
+
+class StorageEngine:
+    """Base class for mock blockchain persistence backends"""
+
+    # Whether prepared records are self-contained and may be written later
+    # from another thread (required by GroupCommitter)
+    supports_group_commit = False
+
+    # Whether collections are loaded on demand, in which case the engine
+    # also answers index lookups and record reads for the chain
+    lazy = False
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load all collections from storage"""
+        raise NotImplementedError
+
+    def prepare(self, changes: List[Change]) -> Any:
+        """Turn one state transition into a record ready to be written"""
+        return changes
+
+    def write(self, records: List[Any]):
+        """Persist prepared records"""
+        raise NotImplementedError
+
+    def append(self, changes: List[Change]):
+        """Persist one state transition"""
+        self.write([self.prepare(changes)])
+
+    def needs_compaction(self) -> bool:
+        """Whether the engine wants a compacted snapshot"""
+        return False
+
+    def compact(self, collections: Dict[str, Dict[str, Any]]):
+        """Write a compacted snapshot of the given collections"""
+
+    def close(self):
+        """Release any open file handles"""
+
+
+class MemoryStorage(StorageEngine):
+    """Keeps everything in memory and persists nothing (for tests)"""
+
+    supports_group_commit = True
+
+    def __init__(self, data_dir: Optional[Path] = None):
+        pass
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        return {name: {} for name in COLLECTIONS}
+
+    def write(self, records: List[Any]):
+        pass
+
+
+class JsonFileStorage(StorageEngine):
+    """Legacy backend that rewrites one JSON file per touched collection"""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.collections: Dict[str, Dict[str, Any]] = {}
+
+    def _file(self, name: str) -> Path:
+        return self.data_dir / f"{name}.json"
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        self.collections = load_json_collections(self.data_dir)
+        return self.collections
+
+    def write(self, records: List[List[Change]]):
+        touched = {name for changes in records for name, _, _ in changes}
+        for name in touched:
+            with open(self._file(name), 'w') as f:
+                json.dump(self.collections[name], f, indent=2)
+
+
+class WalStorage(StorageEngine):
+    """
+    Append-only write-ahead log with periodic compacted snapshots
+
+    Each state transition is appended as one line to the active WAL
+    segment, so a write costs O(size of the changed records) rather than
+    O(total state). Every `snapshot_every` transitions the full state is
+    written to `snapshot.json` and the segments it covers are deleted.
+    Startup loads the snapshot and replays the remaining log tail.
+    """
+
+    supports_group_commit = True
+
+    def __init__(
+        self,
+        data_dir: Path,
+        segment_bytes: int = 4 * 1024 * 1024,
+        snapshot_every: int = 1000,
+        fsync: bool = False
+    ):
+        self.data_dir = Path(data_dir)
+        self.wal_dir = self.data_dir / "wal"
+        self.snapshot_file = self.data_dir / "snapshot.json"
+        self.wal_dir.mkdir(parents=True, exist_ok=True)
+
+        self.segment_bytes = segment_bytes
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._segment = None
+        self._segment_size = 0
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.wal_dir.glob("*.log"))
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        if self.snapshot_file.exists():
+            with open(self.snapshot_file, 'r') as f:
+                snapshot = json.load(f)
+            collections = snapshot["collections"]
+            self.snapshot_seq = snapshot["seq"]
+        else:
+            # First start on a legacy data directory: adopt its JSON files
+            collections = load_json_collections(self.data_dir)
+            self.snapshot_seq = 0
+
+        for name in COLLECTIONS:
+            collections.setdefault(name, {})
+
+        self.seq = self.snapshot_seq
+        replayed = 0
+        for segment in self._segments():
+            valid_bytes = 0
+            with open(segment, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        entry = None
+                    if entry is None or not line.endswith(b"\n"):
+                        # Torn write at the tail of a segment
+                        logger.warning(f"Truncating partial WAL record in {segment.name}")
+                        break
+                    valid_bytes += len(line)
+                    if entry["seq"] <= self.snapshot_seq:
+                        continue
+                    for name, key, value in entry["changes"]:
+                        collections[name][key] = value
+                    self.seq = entry["seq"]
+                    replayed += 1
+            if valid_bytes < segment.stat().st_size:
+                os.truncate(segment, valid_bytes)
+
+        if replayed:
+            logger.info(f"Replayed {replayed} WAL records after snapshot {self.snapshot_seq}")
+
+        self._open_segment()
+        return collections
+
+    def _open_segment(self) -> Path:
+        """Start a new segment whose name is the next sequence number"""
+        if self._segment:
+            self._segment.close()
+        path = self.wal_dir / f"{self.seq + 1:012d}.log"
+        self._segment = open(path, 'a')
+        self._segment_size = path.stat().st_size
+        return path
+
+    def prepare(self, changes: List[Change]) -> str:
+        """Assign the next sequence number and encode the WAL line"""
+        self.seq += 1
+        return json.dumps({"seq": self.seq, "changes": changes}, separators=(",", ":"))
+
+    def write(self, records: List[str]):
+        """Append encoded records with a single write and flush"""
+        data = "\n".join(records) + "\n"
+
+        self._segment.write(data)
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+
+        self._segment_size += len(data)
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment()
+
+    def needs_compaction(self) -> bool:
+        return self.seq - self.snapshot_seq >= self.snapshot_every
+
+    def compact(self, collections: Dict[str, Dict[str, Any]]):
+        active = self._open_segment()
+        obsolete = [segment for segment in self._segments() if segment != active]
+
+        tmp_file = self.snapshot_file.with_suffix(".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump({"seq": self.seq, "collections": collections}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        self.snapshot_seq = self.seq
+
+        # Every record in the old segments is now covered by the snapshot
+        for segment in obsolete:
+            segment.unlink()
+
+    def close(self):
+        if self._segment:
+            self._segment.close()
+            self._segment = None
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    category TEXT NOT NULL,
+    voting_ends_at INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_claims_status ON claims (status, claim_id);
+CREATE INDEX IF NOT EXISTS idx_claims_voting_ends_at ON claims (voting_ends_at);
+
+CREATE TABLE IF NOT EXISTS votes (
+    vote_key TEXT PRIMARY KEY,
+    claim_id INTEGER NOT NULL,
+    voter TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_votes_claim ON votes (claim_id);
+CREATE INDEX IF NOT EXISTS idx_votes_voter ON votes (voter, claim_id);
+
+CREATE TABLE IF NOT EXISTS markets (
+    market_id INTEGER PRIMARY KEY,
+    claim_id INTEGER NOT NULL UNIQUE,
+    resolved INTEGER NOT NULL,
+    expires_at INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_markets_expires_at ON markets (resolved, expires_at);
+
+CREATE TABLE IF NOT EXISTS positions (
+    market_id INTEGER NOT NULL,
+    position_key TEXT NOT NULL,
+    user TEXT NOT NULL,
+    position TEXT NOT NULL,
+    shares REAL NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (market_id, position_key)
+);
+CREATE INDEX IF NOT EXISTS idx_positions_user ON positions (user);
+
+CREATE TABLE IF NOT EXISTS users (
+    address TEXT PRIMARY KEY,
+    reputation INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS merkle_nodes (
+    hash BLOB PRIMARY KEY,
+    left BLOB,
+    right BLOB,
+    path BLOB,
+    digest BLOB
+) WITHOUT ROWID;
+"""
+
+# Primary key column of each record table
+SQLITE_KEYS = {
+    "claims": "claim_id",
+    "votes": "vote_key",
+    "markets": "market_id",
+    "users": "address"
+}
+
+
+class SqliteCollection:
+    """
+    Dict-like view of one SQLite table with a bounded record cache
+
+    Records handed to the chain stay cached (and so keep their identity for
+    in-place mutation) until the next storage write, which persists every
+    record a transition touched before the cache is trimmed.
+    """
+
+    def __init__(self, storage: "SqliteStorage", name: str, cache_size: int):
+        self.storage = storage
+        self.name = name
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._unsaved: set = set()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        value = self.storage.read(self.name, key, self.storage.conn)
+        if value is None:
+            raise KeyError(key)
+        self._cache[key] = value
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._cache and key not in self:
+            self._unsaved.add(key)
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._cache:
+            return True
+        return self.storage.exists(self.name, key, self.storage.conn)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Drop an unsaved record (used to roll back a failed transaction)"""
+        self._unsaved.discard(key)
+        return self._cache.pop(key, default)
+
+    def __len__(self) -> int:
+        return self.storage.count(self.name) + len(self._unsaved)
+
+    def keys(self) -> List[str]:
+        return self.storage.read_keys(self.name)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def saved(self):
+        """Forget unsaved keys and trim the cache after a write"""
+        self._unsaved.clear()
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class SqliteStorage(StorageEngine):
+    """
+    SQLite backend that keeps records on disk and loads them on demand
+
+    Claims, votes, markets (with their positions) and users live in indexed
+    tables, so startup only reads the small state table and memory use is
+    bounded by the record cache. The nodes of the chain's Merkle tree are
+    stored too (written as a "merkle" change), so it is never rebuilt. The
+    database runs in WAL journal mode; writes use the chain's connection
+    under the chain lock, while lock-free readers get their own per-thread
+    connections.
+    """
+
+    # Collections are loaded on demand and the engine answers index lookups
+    lazy = True
+
+    def __init__(self, data_dir: Path, cache_size: int = 10000, db_file: str = "chain.db"):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.data_dir / db_file
+        self.cache_size = cache_size
+
+        self.conn = self._connect()
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._readers = threading.local()
+        self.collections: Dict[str, Any] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._readers.conn = conn
+        return conn
+
+    def load(self) -> Dict[str, Any]:
+        self.collections = {
+            name: SqliteCollection(self, name, self.cache_size)
+            for name in SQLITE_KEYS
+        }
+        self.collections["state"] = {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM state")
+        }
+        return self.collections
+
+    def _decode(self, name: str, row: Tuple, conn: sqlite3.Connection) -> Dict[str, Any]:
+        key, data = row
+        record = json.loads(data)
+        if name == "markets":
+            record["positions"] = {
+                position_key: {"user": user, "position": position, "shares": shares, "amount": amount}
+                for position_key, user, position, shares, amount in conn.execute(
+                    "SELECT position_key, user, position, shares, amount FROM positions WHERE market_id = ?",
+                    (key,)
+                )
+            }
+        return record
+
+    def read(self, name: str, key: str, conn: Optional[sqlite3.Connection] = None) -> Optional[Any]:
+        """Read one record straight from the database"""
+        conn = conn or self._reader()
+        if name == "state":
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+        column = SQLITE_KEYS[name]
+        row = conn.execute(f"SELECT {column}, data FROM {name} WHERE {column} = ?", (key,)).fetchone()
+        return self._decode(name, row, conn) if row else None
+
+    def exists(self, name: str, key: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+        conn = conn or self._reader()
+        column = SQLITE_KEYS[name]
+        return conn.execute(f"SELECT 1 FROM {name} WHERE {column} = ?", (key,)).fetchone() is not None
+
+    def read_merkle_node(self, node_hash: bytes) -> Optional[Tuple]:
+        """A stored Merkle node as (left, right, path, digest)"""
+        return self._reader().execute(
+            "SELECT left, right, path, digest FROM merkle_nodes WHERE hash = ?", (node_hash,)
+        ).fetchone()
+
+    def count(self, name: str) -> int:
+        return self._reader().execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+    def read_keys(self, name: str) -> List[str]:
+        """All keys of a table (full scan)"""
+        if name == "state":
+            return [row[0] for row in self._reader().execute("SELECT key FROM state")]
+        column = SQLITE_KEYS[name]
+        return [str(row[0]) for row in self._reader().execute(f"SELECT {column} FROM {name}")]
+
+    def scan(self, name: str) -> Iterator[Tuple[str, Any]]:
+        """Every record of a table, read past the collection cache"""
+        conn = self._connect()
+        try:
+            column = SQLITE_KEYS[name]
+            for row in conn.execute(f"SELECT {column}, data FROM {name}"):
+                yield str(row[0]), self._decode(name, row, conn)
+        finally:
+            conn.close()
+
+    def write(self, records: List[List[Change]]):
+        """Upsert every changed record in one SQLite transaction"""
+        self.conn.execute("BEGIN")
+        try:
+            for changes in records:
+                for name, key, value in changes:
+                    self._upsert(name, key, value)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        for name in SQLITE_KEYS:
+            if name in self.collections:
+                self.collections[name].saved()
+
+    def _upsert(self, name: str, key: str, value: Any):
+        if name == "merkle":
+            # Nodes are content-addressed, so a node already stored is identical
+            self.conn.executemany("INSERT OR IGNORE INTO merkle_nodes VALUES (?, ?, ?, ?, ?)", value)
+        elif name == "state":
+            self.conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", (key, json.dumps(value)))
+        elif name == "claims":
+            self.conn.execute(
+                "INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?)",
+                (int(key), value["status"], value["category"], value.get("voting_ends_at"), json.dumps(value))
+            )
+        elif name == "votes":
+            self.conn.execute(
+                "INSERT OR REPLACE INTO votes VALUES (?, ?, ?, ?)",
+                (key, int(value["claim_id"]), value["voter"], json.dumps(value))
+            )
+        elif name == "markets":
+            data = {field: item for field, item in value.items() if field != "positions"}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO markets VALUES (?, ?, ?, ?, ?)",
+                (int(key), int(value["claim_id"]), int(value["resolved"]), value.get("expires_at"), json.dumps(data))
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (int(key), position_key, pos["user"], pos["position"], pos["shares"], pos["amount"])
+                    for position_key, pos in value.get("positions", {}).items()
+                ]
+            )
+        elif name == "users":
+            self.conn.execute(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?)",
+                (key, value["reputation"], json.dumps(value))
+            )
+
+    # Index lookups
+
+    def market_for_claim(self, claim_id: int) -> Optional[int]:
+        row = self._reader().execute("SELECT market_id FROM markets WHERE claim_id = ?", (claim_id,)).fetchone()
+        return row[0] if row else None
+
+    def vote_keys_for_claim(self, claim_id: int) -> List[str]:
+        return [row[0] for row in self._reader().execute(
+            "SELECT vote_key FROM votes WHERE claim_id = ?", (claim_id,)
+        )]
+
+    def claim_ids_for_voter(self, voter: str) -> List[int]:
+        return [row[0] for row in self._reader().execute(
+            "SELECT claim_id FROM votes WHERE voter = ? ORDER BY claim_id", (voter,)
+        )]
+
+    def open_deadlines(self) -> List[Tuple[int, str, int]]:
+        """Deadlines of unsettled claims and unresolved markets"""
+        conn = self._reader()
+        claims = conn.execute(
+            "SELECT voting_ends_at, claim_id FROM claims "
+            "WHERE voting_ends_at IS NOT NULL AND json_extract(data, '$.settled') IS NULL"
+        )
+        markets = conn.execute(
+            "SELECT expires_at, market_id FROM markets WHERE resolved = 0 AND expires_at IS NOT NULL"
+        )
+        return (
+            [(deadline, "claim", claim_id) for deadline, claim_id in claims]
+            + [(deadline, "market", market_id) for deadline, market_id in markets]
+        )
+
+    def query_claims(
+        self,
+        status: Optional[str] = None,
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Range query over claims ordered by claim id"""
+        sql = "SELECT claim_id, data FROM claims WHERE claim_id > ?"
+        params: List[Any] = [after_id]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY claim_id LIMIT ?"
+        params.append(limit)
+        conn = self._reader()
+        return [self._decode("claims", row, conn) for row in conn.execute(sql, params)]
+
+    def close(self):
+        self.conn.close()
+
+
+class CommitTicket:
+    """Handle a writer waits on until its transition is durable"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error: Optional[Exception] = None
+
+    def resolve(self, error: Optional[Exception] = None):
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error:
+            raise self.error
+
+
+class GroupCommitter:
+    """
+    Background committer that batches transitions from many writers
+
+    Writers enqueue prepared records and get a ticket back; the committer
+    thread drains up to `batch_size` records (waiting at most `max_delay`
+    seconds for a batch to fill), writes them with one storage write and
+    resolves every ticket in the batch.
+    """
+
+    def __init__(self, storage: StorageEngine, batch_size: int = 64, max_delay: float = 0.001):
+        if not storage.supports_group_commit:
+            raise ValueError(f"{type(storage).__name__} does not support group commit")
+
+        self.storage = storage
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+
+        self.batches = 0
+        self.transitions = 0
+        self.max_batch_size = 0
+        self.last_batch_size = 0
+        self.batch_histogram: Dict[int, int] = {}
+
+        self._thread = threading.Thread(target=self._run, name="mock-chain-committer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Any) -> CommitTicket:
+        """Queue a prepared record for the next batch"""
+        ticket = CommitTicket()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Group committer is closed")
+            self._queue.append((record, ticket))
+            self._cond.notify()
+        return ticket
+
+    def _next_batch(self) -> List[Tuple[Any, CommitTicket]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.max_delay
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            error = None
+            with self._io_lock:
+                try:
+                    self.storage.write([record for record, _ in batch])
+                except Exception as e:
+                    logger.error(f"Group commit failed: {e}")
+                    error = e
+
+            self.batches += 1
+            self.transitions += len(batch)
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.batch_histogram[len(batch)] = self.batch_histogram.get(len(batch), 0) + 1
+
+            for _, ticket in batch:
+                ticket.resolve(error)
+
+    def compact(self, collections: Dict[str, Dict[str, Any]]):
+        """Compact storage without racing the committer thread"""
+        with self._io_lock:
+            self.storage.compact(collections)
+
+    def stats(self) -> Dict[str, Any]:
+        """Achieved batching so far"""
+        return {
+            "batches": self.batches,
+            "transitions": self.transitions,
+            "avg_batch_size": self.transitions / self.batches if self.batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "batch_histogram": dict(self.batch_histogram),
+            "pending": len(self._queue)
+        }
+
+    def close(self):
+        """Flush everything queued and stop the committer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+
+def load_json_collections(data_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Load the legacy one-file-per-collection layout"""
+    collections = {}
+    for name in COLLECTIONS:
+        file_path = Path(data_dir) / f"{name}.json"
+        if file_path.exists():
+            with open(file_path, 'r') as f:
+                collections[name] = json.load(f)
+        else:
+            collections[name] = {}
+    return collections
+
+
+def create_storage(kind: str, data_dir: Path, **options) -> StorageEngine:
+    """Create a storage engine by name"""
+    if kind == "wal":
+        return WalStorage(data_dir, **options)
+    if kind == "json":
+        return JsonFileStorage(data_dir)
+    if kind == "memory":
+        return MemoryStorage()
+    if kind == "sqlite":
+        return SqliteStorage(data_dir, **options)
+    raise ValueError(f"Unknown storage engine: {kind}")